@@ -1,13 +1,15 @@
 # Env config file connection
 import configparser
-import glob
+import hashlib
 import logging
 import os
+import pickle
 import re
+import stat
 import sys
 import webbrowser
 from pathlib import Path
-from shutil import copy
+from shutil import copyfile
 from subprocess import Popen, PIPE, call
 from time import sleep
 from urllib.parse import quote
@@ -35,35 +37,69 @@ handlers.append(consoleHandler)
 logging.basicConfig(level=logging.INFO, handlers=handlers)
 
 logger = logging.getLogger(__name__)
-Path.lexists = lambda self: self.is_symlink() or self.exists()  # not yet exist https://bugs.python.org/issue34137
 default_path = Path(Path(__file__).resolve().parent, "defaults")  # path to the 'defaults' folder with templates
 
 config_dir = user_config_dir("convey")
+CONFIG_CACHE = "config.cache.pkl"  # parsed config.ini values, valid as long as config files metadata stay the same
 BOOLEAN_STATES = configparser.RawConfigParser.BOOLEAN_STATES
+_NOT_CACHED = object()  # Config.cache may hold None values
+
+
+def file_key(*paths):
+    """ Metadata that change whenever any of the files does. """
+    key = []
+    for path in paths:
+        st = os.stat(path)
+        key.append((str(path), st.st_mtime_ns, st.st_size))
+    return tuple(key)
+
+
+def load_cached(name, key):
+    """ Return the value pickled in the config dir if it was saved with the same key, otherwise None. """
+    try:
+        with open(Path(config_dir, name), "rb") as f:
+            cached_key, value = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        return None
+    return value if cached_key == key else None
+
+
+def save_cached(name, key, value):
+    """ Pickle the value to the config dir. Skipped silently if the dir is not writable. """
+    path = Path(config_dir, name)
+    temp = Path(config_dir, name + ".tmp")
+    try:
+        with open(temp, "wb") as f:
+            pickle.dump((key, value), f)
+        os.replace(temp, path)
+    except OSError:
+        pass
+
+
+def _lstat(path):
+    """ Single syscall telling whether anything (even a broken symlink) is at the path and whether it is a symlink. """
+    try:
+        return os.lstat(path)
+    except OSError:  # not found or ex we run program from /root under another user
+        return None
 
 
 def get_path(file):
     """ Assures the file is ready, or creates a new one from a default. """
     global config_dir
     exists = True
-    try:
-        b = Path(file).lexists()
-    except PermissionError as e:
-        b = False  # ex we run program from /root under another user
-    finally:
-        if b:
-            # check the .ini file is at current location
-            file = Path(Path.cwd(), file)
-        elif Path(Path(sys.argv[0]).parent, file).lexists():
-            # file at program folder (I.E. at downloaded github folder)
-            file = Path(Path(sys.argv[0]).parent, file)
-        elif Path(config_dir, file).lexists():
-            # INIT file at user config folder
-            file = Path(config_dir, file)
-        else:
-            exists = False
-
-    if exists:
+    program_dir = os.path.dirname(sys.argv[0])
+    for candidate in (os.path.join(os.getcwd(), file),  # check the .ini file is at current location
+                      os.path.join(program_dir, file),  # file at program folder (I.E. at downloaded github folder)
+                      os.path.join(config_dir, file)):  # INIT file at user config folder
+        st = _lstat(candidate)
+        if st:
+            file = Path(candidate)
+            break
+    else:
+        exists = False
+
+    if exists and stat.S_ISLNK(st.st_mode):  # only a symlink may point nowhere
         while not Path(file).exists():
             i = input(f"File on the path {file} may be a broken symlink. "
                       f"Mount it and press any key / 'q' for program exit / 'c' for recreating files / 'i' temporarily ignore: ")
@@ -76,9 +112,9 @@ def get_path(file):
             elif i == 'i':
                 return file
 
-    if not exists or not Path(file).exists():
+    if not exists:
         # create INI file at user config folder or at program directory
-        program_path = Path(sys.argv[0]).parent.resolve()
+        program_path = Path(program_dir).resolve()
         if input("It seems this is a first run, since file {} haven't been found."
                  "\nShould we create a default config files at user config folder ({})? "
                  "Otherwise, they'll be created at program folder: {} [Y/n] ".format(file, config_dir, program_path)) \
@@ -87,8 +123,10 @@ def get_path(file):
         else:
             config_dir = program_path
         try:
-            for filename in glob.glob(str(Path(default_path, '*.*'))):
-                copy(filename, config_dir)
+            with os.scandir(default_path) as it:
+                for entry in it:
+                    if "." in entry.name and entry.is_file():
+                        copyfile(entry.path, Path(config_dir, entry.name))
             file = "{}/{}".format(config_dir, file)
         except Exception as e:
             print(e)
@@ -99,11 +137,14 @@ def get_path(file):
 
 
 class Config:
-    path = get_path("config.ini")
+    """ Values are loaded lazily at the first access so that importing the module stays cheap. """
+    path = None
+    is_loaded = False
     cache = {}
-
-    config = configparser.ConfigParser()
-    config.read(path)
+    config: configparser.ConfigParser = None  # parsed only if the cached values are missing or stale
+    values = {}  # [(section, key)] = raw value from config.ini
+    cache_key = None  # config files metadata the values were parsed from
+    is_verified = False  # values passed integrity_check
 
     # muted = False  # silence info text
 
@@ -112,6 +153,8 @@ class Config:
     UNKNOWN_NAME = "unknown"
     PROJECT_SITE = "https://github.com/CZ-NIC/convey/"
     verbosity: int = logging.INFO  # standard python3 logging level int
+    debug: bool = None  # resolved by is_debug() on the first call
+    testing: bool = None  # resolved by is_testing() on the first call
 
     @staticmethod
     def missing_dependency(library):
@@ -119,40 +162,80 @@ class Config:
         input("Press any key...")
         raise KeyboardInterrupt
 
+    @staticmethod
+    def assure_loaded():
+        if not Config.is_loaded:
+            Config.load()
+
+    @staticmethod
+    def load():
+        """ Load config.ini values, from the pickled cache if neither config.ini nor the default config changed since. """
+        Config.path = get_path("config.ini")
+        # the defaults are identified by contents since a reinstall touches their metadata even when nothing changed
+        defaults_hash = hashlib.blake2b(Path(default_path, "config.ini").read_bytes(), digest_size=8).digest()
+        try:
+            Config.cache_key = file_key(Config.path), defaults_hash
+        except OSError:  # ex: a broken symlink the user chose to ignore, configparser skips the file then
+            Config.cache_key = None
+        values = load_cached(CONFIG_CACHE, Config.cache_key) if Config.cache_key else None
+        if values is not None:
+            Config.values = values
+            Config.is_verified = True  # we cache only the values that passed the integrity check
+        else:
+            Config.config = configparser.ConfigParser()
+            Config.config.read(Config.path)
+            Config.values = Config._parse_values(Config.config)
+            Config.is_verified = False
+        Config.is_loaded = True
+
+    @staticmethod
+    def _parse_values(config):
+        values = {}
+        for section in config.sections():
+            for key in config[section]:
+                try:
+                    values[section, key] = config[section][key]
+                except configparser.Error:  # ex: interpolation failed, the key is considered missing
+                    pass
+        return values
+
+    @staticmethod
+    def get_section(section):
+        """ Raw values of the section keys. """
+        Config.assure_loaded()
+        return {key: val for (s, key), val in Config.values.items() if s == section}
+
     @staticmethod
     def integrity_check():
+        Config.assure_loaded()
+        if Config.is_verified:
+            return
         from .dialogue import is_yes  # since Config should be the very first package file to be loaded, we postpone this import
         # Config file integrity check (we may upgrade Convey from but some new parameters needs to be added manually)
         default_config = configparser.ConfigParser()
         default_ini = Path(default_path, "config.ini")
         default_config.read(default_ini)
-        passed = True
         section_missing = []
         section_superfluous = []
         key_missing = {}  # [key] => section
         key_superfluous = []
+        sections, default_sections = set(Config.config), set(default_config)
+        for section in sorted(default_sections - sections):
+            print(f"Missing section: {section}")
+            section_missing.append(section)
         for section in default_config:
-            missing_section = False
-            if section not in Config.config:
-                print(f"Missing section: {section}")
-                section_missing.append(section)
-                passed = False
-                missing_section = True
-                # continue
-            for key in default_config[section]:
-                if missing_section or key not in Config.config[section]:
-                    print(f"Missing key {key} (defaulting to {repr(default_config[section][key])}) in section: {section}")
-                    key_missing[key] = section
-                    passed = False
-        for section in Config.config:
-            if section not in default_config:
-                print(f"(Config has an unused section: {section})")
-                section_superfluous.append(section)
-                continue
-            for key in Config.config[section]:
-                if key not in default_config[section]:
-                    print(f"Config has an unused key {key} in section: {section}")
-                    key_superfluous.append(key)
+            keys = set(Config.config[section]) if section in sections else set()
+            for key in sorted(set(default_config[section]) - keys):
+                print(f"Missing key {key} (defaulting to {repr(default_config[section][key])}) in section: {section}")
+                key_missing[key] = section
+        for section in sorted(sections - default_sections):
+            print(f"(Config has an unused section: {section})")
+            section_superfluous.append(section)
+        for section in sections & default_sections:
+            for key in sorted(set(Config.config[section]) - set(default_config[section])):
+                print(f"Config has an unused key {key} in section: {section}")
+                key_superfluous.append(key)
+        passed = not section_missing and not key_missing
         if not passed:
             # analyze current config file and get its section start line numbers
             config_lines = Config.path.read_text().splitlines(keepends=True)
@@ -206,6 +289,11 @@ class Config:
                 p = Popen(["xdg-open", Config.path], shell=False)
             quit()
 
+        # next time, skip parsing and checking as far as the config files are not modified
+        if Config.cache_key:
+            save_cached(CONFIG_CACHE, Config.cache_key, Config._parse_values(Config.config))
+        Config.is_verified = True
+
     @staticmethod
     def init_verbosity(yes=False, verbosity=None):
         # Set up logging and verbosity
@@ -225,6 +313,7 @@ class Config:
         consoleHandler.setLevel(Config.verbosity)  # stream handler to debug level
         logging.getLogger().setLevel(min(Config.verbosity, logging.INFO))  # system sensitivity at least at INFO level
 
+        Config.assure_loaded()
         logger.debug("Config file loaded from: {}".format(Config.path))
 
     @staticmethod
@@ -258,7 +347,9 @@ class Config:
 
     @staticmethod
     def is_debug():
-        return Config.get('debug')
+        if Config.debug is None:
+            Config.debug = bool(Config.get('debug'))
+        return Config.debug
 
     @staticmethod
     def is_quiet():
@@ -270,7 +361,9 @@ class Config:
 
     @staticmethod
     def is_testing():
-        return Config.get('testing')
+        if Config.testing is None:
+            Config.testing = bool(Config.get('testing'))
+        return Config.testing
 
     @staticmethod
     def get(key, section='CONVEY', get=None):
@@ -286,22 +379,20 @@ class Config:
                     * None for text = '' or non-inserted value
                     * or any inserted value if non-conforming to previous possibilities
         """
-        if key not in Config.cache:
-            try:
-                val = Config.config[section][key]
-                if (get is None or get is bool) and val.lower() in BOOLEAN_STATES:
-                    val = BOOLEAN_STATES[val.lower()]
-                elif val == '':
-                    val = get() if get else None
-            except (configparser.Error, KeyError):
+        val = Config.cache.get((section, key), _NOT_CACHED)
+        if val is _NOT_CACHED:
+            Config.assure_loaded()
+            val = Config.values.get((section, key))  # raw values are always str, None means missing
+            if val is None:
                 return get() if get else None
-            Config.cache[key] = val
-        val = Config.cache[key]
+            if (get is None or get is bool) and val.lower() in BOOLEAN_STATES:
+                val = BOOLEAN_STATES[val.lower()]
+            elif val == '':
+                val = get() if get else None
+            Config.cache[section, key] = val
         if get is str and type(val) is not str:
-            try:
-                return str(Config.config[section][key])
-            except KeyError:
-                return ''
+            Config.assure_loaded()
+            return Config.values.get((section, key), '')
         elif get is list:
             if val:
                 return [x.strip() for x in val.split(",")]
@@ -322,10 +413,14 @@ class Config:
 
     @staticmethod
     def set(key, val, section='CONVEY'):
+        Config.assure_loaded()
+        if section == 'CONVEY' and key in ('debug', 'testing'):
+            setattr(Config, key, None)  # let is_debug() / is_testing() resolve again
         if val is None:
-            Config.config.remove_option(section, key)
+            Config.values.pop((section, key), None)
+            Config.cache.pop((section, key), None)
         else:
-            Config.cache[key] = val
+            Config.cache[section, key] = val
             # XX Config.config.set(section, key, str(val))
 
     cache_dir = ""
@@ -344,6 +439,7 @@ class Config:
 
     @staticmethod
     def edit_configuration(flags=3):
+        Config.assure_loaded()
         if flags & 2:
             app = Popen(['xdg-open', Config.path], stdout=PIPE, stderr=PIPE)
         elif flags & 1:
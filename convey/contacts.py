@@ -1,13 +1,16 @@
 import csv
+import os
 import re
 from pathlib import Path
 from typing import Dict
 
-from validate_email import validate_email
-
-from .config import Config, get_path
+from .config import Config, get_path, file_key, load_cached, save_cached
 from .mailDraft import MailDraft
 
+re_domain = re.compile(r"@((?:[A-Za-z0-9-]{1,63}\.)+[A-Za-z]{2,6})")
+re_domain_full = re.compile(r"(?:[A-Za-z0-9-]{1,63}\.)+[A-Za-z]{2,6}")
+re_email = re.compile(r"[^@\s]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+
 
 class Attachment:
     sent: bool  # True => sent, False => error while sending, None => not yet sent
@@ -29,52 +32,65 @@ class Attachment:
     def get_partner(cls, attachments):
         return cls._get(attachments, True)
 
+    @staticmethod
+    def _existing_paths(cache_dir):
+        """ File names in the cache dir. Listed at once so that we do not try to open every attachment. """
+        try:
+            return {e.name for e in os.scandir(cache_dir)}
+        except FileNotFoundError:
+            return set()
+
     @classmethod
     def _get(cls, attachments, listed_only=False):
+        cache_dir = Config.get_cache_dir()
+        existing = cls._existing_paths(cache_dir)
+        existing.difference_update((Config.UNKNOWN_NAME, Config.INVALID_NAME))
+        csirtmails = Contacts.csirtmails
+        abusemails = Contacts.abusemails
+        get_domains = Contacts.get_domains
         for o in attachments:
-            if o.path in [Config.UNKNOWN_NAME, Config.INVALID_NAME]:
+            if o.path not in existing:
                 continue
 
-            cc = ""
-
             if listed_only:
-                if o.path in Contacts.csirtmails:
-                    mail = Contacts.csirtmails[o.path]
+                if o.path in csirtmails:
+                    mail = csirtmails[o.path]
                 else:  # we don't want send to standard abuse mail, just to a partner
                     continue
             else:
                 mail = o.path
 
-            for domain in Contacts.get_domains(mail):
-                if domain in Contacts.abusemails:
-                    cc += Contacts.abusemails[domain] + ";"
+            cc = ";".join(abusemails[domain] for domain in get_domains(mail) if domain in abusemails)
 
             try:
-                with open(o.get_abs_path(), "r") as f:
-                    yield o, mail, cc, f.read()
+                contents = Path(cache_dir, o.path).read_text(encoding="utf-8", errors="replace")
             except FileNotFoundError:
                 continue
+            yield o, mail, cc, contents
 
     @classmethod
     def refresh_attachment_stats(cls, csv):
         attachments = csv.attachments
         st = csv.stats
-        st["partner_count"] = [0, 0]
-        st["abuse_count"] = [0, 0]
-        st["non_deliverable"] = 0
-        st["totals"] = 0
-
+        partner_count = st["partner_count"] = [0, 0]
+        abuse_count = st["abuse_count"] = [0, 0]
+        csirtmails = Contacts.csirtmails
+        validate = re_email.fullmatch
+        non_deliverable = 0
         for o in attachments:
-            if o.path in Contacts.csirtmails:
-                st["partner_count"][int(bool(o.sent))] += 1
+            path = o.path
+            sent = 1 if o.sent else 0
+            if path in csirtmails:
+                partner_count[sent] += 1
                 o.partner = True
-            elif validate_email(o.path):
-                st["abuse_count"][int(bool(o.sent))] += 1
+            elif validate(path):
+                abuse_count[sent] += 1
                 o.partner = False
             else:
-                st["non_deliverable"] += 1
+                non_deliverable += 1
                 o.partner = None
-            st["totals"] += 1
+        st["non_deliverable"] = non_deliverable
+        st["totals"] = len(attachments)
 
 
 class Contacts:
@@ -97,22 +113,37 @@ class Contacts:
     def get_domains(mailStr):
         """ mail = mail@example.com;mail2@example2.com -> [example.com, example2.com] """
         try:
-            # return set(re.findall("@([\w.]+)", mail))
-            return set([x[0] for x in re.findall("@(([A-Za-z0-9-]{1,63}\.)+[A-Za-z]{2,6})", mailStr)])
+            domains = set()
+            for address in mailStr.split(";"):
+                _, at, domain = address.strip().partition("@")
+                if not at:
+                    continue
+                if not re_domain_full.fullmatch(domain):  # not a plain address, let the regex search the whole string
+                    return set(re_domain.findall(mailStr))
+                domains.add(domain)
+            return domains
         except AttributeError:
             return []
 
     @staticmethod
     def _update(key: Dict[str, str]) -> object:
-        """ Update info from an external CSV file. """
+        """ Update info from an external CSV file. Parsed contacts are cached until the file changes. """
         file = get_path(Config.get(key))
         if not Path(file).is_file():  # file with contacts
             print("(Contacts file {} not found on path {}.) ".format(key, file))
             input()
             return {}
-        else:
-            with open(file, 'r') as csvfile:
-                reader = csv.reader(csvfile)
-                next(reader)  # skip header row
-                rows = {rows[0]: rows[1] for rows in reader}
-                return rows
+        cache_name = key + ".cache.pkl"
+        cache_key = file_key(file)
+        contacts = load_cached(cache_name, cache_key)
+        if contacts is None:
+            contacts = Contacts._parse(file)
+            save_cached(cache_name, cache_key, contacts)
+        return contacts
+
+    @staticmethod
+    def _parse(file):
+        lines = Path(file).read_text().splitlines()[1:]  # skip header row
+        if any('"' in line for line in lines):  # quoted values may contain a comma, let the csv module parse them
+            return {row[0]: row[1] for row in csv.reader(lines) if row}
+        return dict(line.split(",", 2)[:2] for line in lines if "," in line)
@@ -7,22 +7,23 @@ from pathlib import Path
 from sys import exit
 
 import pkg_resources
-from Levenshtein import distance
-from dialog import Dialog, DialogError
+from dialog import DialogError
 from prompt_toolkit import PromptSession, HTML
 from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.shortcuts import clear
 
 from .config import Config, get_terminal_size
 from .contacts import Contacts, Attachment
-from .dialogue import Cancelled, Debugged, Menu, pick_option, ask
-from .mailSender import MailSenderOtrs, MailSenderSmtp
+from .dialogue import Cancelled, Debugged, Menu, pick_option, ask, dialog
 from .parser import Parser, Field
+from .processor import OUTPUT_DIALECT
 from .types import Types, TypeGroup, types, Type, graph, PickMethod, methods, PickBase, PickInput
 from .wizzard import Preview, bottom_plain_style
 from .wrapper import Wrapper
 
 logger = logging.getLogger(__name__)
+CSV_FLAGS = (("otrs_id", "Ticket id"), ("otrs_num", "Ticket num"), ("otrs_cookie", "OTRS cookie"),
+             ("otrs_token", "OTRS token"))  # CLI flags stored to the parser
 
 try:
     __version__ = pkg_resources.require("convey")[0].version
@@ -46,6 +47,22 @@ class BlankTrue(argparse.Action):
 
 
 new_fields = []
+re_field_custom = re.compile(r"(\w*)\[([^]]*)\]")
+
+
+def parse_field_spec(spec):
+    """ Parse `FIELD[CUSTOM],[COLUMN],[SOURCE_TYPE],[CUSTOM]...` into a tuple (field name, [COLUMN, ...], [CUSTOM]).
+        Used as argparse type so that a malformed spec is reported with the usage message. """
+    task = next(csv.reader([spec]), None)
+    if not task or not task[0]:
+        raise argparse.ArgumentTypeError(f"missing FIELD in {spec!r}")
+    custom = []
+    target_type = task[0]
+    m = re_field_custom.search(target_type)
+    if m:
+        target_type = m.group(1)
+        custom = [m.group(2)]
+    return target_type, task[1:], custom
 
 
 class FieldExcludedAppend(argparse.Action):
@@ -67,9 +84,32 @@ class SmartFormatter(argparse.HelpFormatter):
         return argparse.HelpFormatter._split_lines(self, text, width)
 
 
+def get_standalone_flag(flag, const):
+    """ If the flag with an optional int argument is the only thing on the command line, return its value.
+        That way we may short-circuit before building the argument parser. """
+    argv = sys.argv[1:]
+    if argv == [flag]:
+        return const
+    if len(argv) == 2 and argv[0] == flag and argv[1].isdigit():
+        return int(argv[1])
+    if len(argv) == 1 and argv[0].startswith(flag + "=") and argv[0][len(flag) + 1:].isdigit():
+        return int(argv[0][len(flag) + 1:])
+    return None
+
+
 class Controller:
     def __init__(self):
+        flags = get_standalone_flag("--config", 3)
+        if flags is not None:
+            self.edit_configuration(flags)
+            quit()
         Types.refresh()  # load types so that we can print out computable types in the help text
+        flags = get_standalone_flag("--show-uml", 1)
+        if flags is not None:
+            self.disable_modules()
+            Config.init_verbosity()
+            print(Types.get_uml(flags))
+            quit()
         epilog = "To launch a web service see README.md."
         column_help = "COLUMN is ID the column (1, 2, 3...), the exact column name, field type name or its usual name."
         parser = argparse.ArgumentParser(description="Data conversion swiss knife", formatter_class=SmartFormatter, epilog=epilog)
@@ -109,17 +149,17 @@ class Controller:
                                  "\n    (Note the comma without space behind 'netname'.)"
                                  "\n\nComputable fields: " + "".join("\n* " + t.doc() for t in Types.get_computable_types()) +
                                  "\n\nThis flag May be used multiple times.",
-                            action=FieldVisibleAppend, metavar="FIELD,[COLUMN],[SOURCE_TYPE],[CUSTOM],[CUSTOM]")
+                            action=FieldVisibleAppend, type=parse_field_spec, metavar="FIELD,[COLUMN],[SOURCE_TYPE],[CUSTOM],[CUSTOM]")
         parser.add_argument('-fe', '--field-excluded', help="The same as field but its column will not be added to the output.",
-                            action=FieldExcludedAppend, metavar="FIELD,[COLUMN],[SOURCE_TYPE],[CUSTOM],[CUSTOM]")
+                            action=FieldExcludedAppend, type=parse_field_spec, metavar="FIELD,[COLUMN],[SOURCE_TYPE],[CUSTOM],[CUSTOM]")
         parser.add_argument('--split', help="Split by this COLUMN.",
                             metavar="COLUMN")
         parser.add_argument('-s', '--sort', help="List of columns.",
                             metavar="[COLUMN],...")
-        csv_flags = [("otrs_id", "Ticket id"), ("otrs_num", "Ticket num"), ("otrs_cookie", "OTRS cookie"),
-                     ("otrs_token", "OTRS token")]
-        for flag in csv_flags:
-            parser.add_argument('--' + flag[0], help=flag[1])
+        parser.add_argument('--otrs_id', help="Ticket id")
+        parser.add_argument('--otrs_num', help="Ticket num")
+        parser.add_argument('--otrs_cookie', help="OTRS cookie")
+        parser.add_argument('--otrs_token', help="OTRS token")
         parser.add_argument('--csirt-incident', action="store_true",
                             help="Macro that lets you split CSV by fetched incident-contact (whois abuse mail for local country"
                                  " or csirt contact for foreign countries) and send everything by OTRS."
@@ -174,16 +214,15 @@ class Controller:
         if args.config is not None:
             self.edit_configuration(args.config)
             quit()
-        for flag in ["output", "web", "whois", "nmap", "dig", "delimiter", "quote_char", "compute_preview", "user_agent",
-                     "multiple_hostname_ip", "multiple_cidr_ip", "whois_ttl", "disable_external"]:
-            if getattr(args, flag) is not None:
-                Config.set(flag, getattr(args, flag))
+        for section, flags in {"CONVEY": ["output", "compute_preview", "disable_external"],
+                               "FIELDS": ["web", "whois", "nmap", "dig", "user_agent", "multiple_hostname_ip",
+                                          "multiple_cidr_ip", "whois_ttl"],
+                               "CSV": ["delimiter", "quote_char"]}.items():
+            for flag in flags:
+                if getattr(args, flag) is not None:
+                    Config.set(flag, getattr(args, flag), section)
         Types.refresh()  # reload Types for the second time so that the methods reflect CLI flags
-        for module in ["whois", "web", "nmap", "dig"]:
-            if Config.get(module, "FIELDS") is False:
-                if module == "dig":
-                    module = "dns"
-                getattr(TypeGroup, module).disable()
+        self.disable_modules()
         if args.debug:
             Config.set("debug", True)
         if args.headless:
@@ -198,9 +237,9 @@ class Controller:
             quit()
         Config.integrity_check()
         if args.header:
-            Config.set("header", True)
+            Config.set("header", True, "CSV")
         if args.no_header:
-            Config.set("header", False)
+            Config.set("header", False, "CSV")
         if args.csv_processing:
             Config.set("single_query", False)
         if args.single_query or args.single_detect:
@@ -211,40 +250,37 @@ class Controller:
         self.parser: Parser = self.wrapper.parser
 
         # load flags
-        for flag in csv_flags:
-            if args.__dict__[flag[0]]:
-                self.parser.__dict__[flag[0]] = args.__dict__[flag[0]]
-                logger.debug("{}: {}".format(flag[1], flag[0]))
+        for flag, help_ in CSV_FLAGS:
+            val = getattr(args, flag)
+            if val:
+                setattr(self.parser, flag, val)
+                logger.debug("{}: {}".format(help_, flag))
 
         # prepare some columns to be removed
         if args.delete:
-            for c in args.delete.split(","):
-                try:
-                    self.parser.fields[self.parser.identifier.get_column_i(c)].is_chosen = False
-                except TypeError:
+            columns = self.parser.identifier.resolve_columns(args.delete.split(","))
+            for c, i in columns.items():
+                if i is None:
                     logger.error(f"Cannot identify COLUMN {c} to be deleted, "
                                  f"put there an exact column name or the numerical order starting with 1.")
                     quit()
+            for i in set(columns.values()):
+                self.parser.fields[i].is_chosen = False
             self.parser.is_processable = True
 
         # append new fields from CLI
-        for add, task in new_fields:
+        types_by_name = {t.name: t for t in types} if new_fields else None
+        for add, (name, task, custom) in new_fields:
             # FIELD,[COLUMN],[SOURCE_TYPE], ex: `netname 3|"IP address" ip|sourceip`
-            task = [x for x in csv.reader([task])][0]
-            custom = []
-            target_type = task[0]
-            m = re.search(r"(\w*)\[([^]]*)\]", target_type)
-            if m:
-                target_type = m.group(1)
-                custom = [m.group(2)]
             try:
-                target_type = types[types.index(target_type)]  # determine FIELD by exact name
-            except ValueError:
-                d = {t.name: distance(task[0], t.name) for t in Types.get_computable_types()}
+                target_type = types_by_name[name]  # determine FIELD by exact name
+            except KeyError:
+                from Levenshtein import distance
+                d = {t.name: distance(name, t.name) for t in Types.get_computable_types()}
                 rather = min(d, key=d.get)
-                logger.error(f"Unknown field '{task[0]}', did not you mean '{rather}'?")
+                logger.error(f"Unknown field '{name}', did not you mean '{rather}'?")
                 quit()
-            source_field, source_type, c = self.parser.identifier.get_fitting_source(target_type, *task[1:])
+            source_field, source_type, c = self.parser.identifier.get_fitting_source(target_type, *task)
             custom = c + custom
             self.source_new_column(target_type, add, source_field, source_type, custom)
             self.parser.is_processable = True
@@ -282,7 +318,47 @@ class Controller:
         if args.headless:
             self.close()
 
-        # main menu
+        self.main_menu()
+
+    def main_menu(self):
+        bindings = KeyBindings()
+        session = PromptSession()
+
+        def refresh():
+            session.app.exit(session.layout.current_buffer.text or "refresh")
+
+        @bindings.add('right')  # select column
+        def _(_):
+            self.parser.move_selection(1)
+            refresh()
+
+        @bindings.add('left')  # select column
+        def _(_):
+            self.parser.move_selection(-1)
+            refresh()
+
+        @bindings.add('c-right')  # control-right to move the column
+        def _(_):
+            self.parser.move_selection(1, True)
+            refresh()
+
+        @bindings.add('c-left')  # control-left to move the column
+        def _(_):
+            self.parser.move_selection(-1, True)
+            refresh()
+
+        @bindings.add('delete')  # enter to toggle selected field
+        def _(_):
+            for f in self.parser.fields:
+                if f.is_selected:
+                    f.toggle_chosen()
+            refresh()
+
+        options = {'key_bindings': bindings,
+                   "bottom_toolbar": HTML("Ctrl+<b>←/→</b> arrows for column manipulation, <b>Delete</b> for exclusion"),
+                   "style": bottom_plain_style
+                   }
+        menu = menu_state = None
         while True:
             self.parser = self.wrapper.parser  # may be changed by reprocessing
             self.parser.informer.sout_info()
@@ -293,68 +369,11 @@ class Controller:
                 self.start_debugger = False
                 Config.get_debugger().set_trace()
 
-            menu = Menu(title="Main menu - how the file should be processed?")
-            menu.add("Pick or delete columns", self.choose_cols)
-            menu.add("Add a column", self.add_column)
-            menu.add("Unique filter", self.add_uniquing)
-            menu.add("Value filter", self.add_filtering)
-            menu.add("Split by a column", self.add_splitting)
-            menu.add("Change CSV dialect", self.add_dialect)
-            if self.parser.is_processable:
-                menu.add("process", self.process, key="p", default=True)
-            else:
-                menu.add("process  (choose some actions)")
-            if self.parser.is_analyzed and self.parser.is_split:
-                if self.parser.is_processable:
-                    menu.add("send (process first)")
-                else:
-                    menu.add("send", self.send_menu, key="s", default=True)
-            else:
-                menu.add("send (split first)")
-            if self.parser.is_analyzed:
-                menu.add("show all details", lambda: (self.parser.informer.sout_info(full=True), input()), key="d")
-            else:
-                menu.add("show all details (process first)")
-            menu.add("Refresh...", self.refresh_menu, key="r")
-            menu.add("Config...", self.config_menu, key="c")
-            menu.add("exit", self.close, key="x")
+            state = self.parser.is_processable, self.parser.is_analyzed, self.parser.is_split
+            if state != menu_state:  # menu items depend on the parser state only
+                menu, menu_state = self._get_main_menu(*state), state
 
             try:
-                bindings = KeyBindings()
-                session = PromptSession()
-
-                def refresh():
-                    session.app.exit(session.layout.current_buffer.text or "refresh")
-
-                @bindings.add('right')  # select column
-                def _(_):
-                    self.parser.move_selection(1)
-                    refresh()
-
-                @bindings.add('left')  # select column
-                def _(_):
-                    self.parser.move_selection(-1)
-                    refresh()
-
-                @bindings.add('c-right')  # control-right to move the column
-                def _(_):
-                    self.parser.move_selection(1, True)
-                    refresh()
-
-                @bindings.add('c-left')  # control-left to move the column
-                def _(_):
-                    self.parser.move_selection(-1, True)
-                    refresh()
-
-                @bindings.add('delete')  # enter to toggle selected field
-                def _(_):
-                    [f.toggle_chosen() for f in self.parser.fields if f.is_selected]
-                    refresh()
-
-                options = {'key_bindings': bindings,
-                           "bottom_toolbar": HTML("Ctrl+<b>←/→</b> arrows for column manipulation, <b>Delete</b> for exclusion"),
-                           "style": bottom_plain_style
-                           }
                 menu.sout(session, options)
             except Cancelled as e:
                 print(e)
@@ -362,15 +381,53 @@ class Controller:
             except Debugged as e:
                 Config.get_debugger().set_trace()
 
+    def _get_main_menu(self, processable, analyzed, split):
+        menu = Menu(title="Main menu - how the file should be processed?")
+        menu.add("Pick or delete columns", self.choose_cols)
+        menu.add("Add a column", self.add_column)
+        menu.add("Unique filter", self.add_uniquing)
+        menu.add("Value filter", self.add_filtering)
+        menu.add("Split by a column", self.add_splitting)
+        menu.add("Change CSV dialect", self.add_dialect)
+        if processable:
+            menu.add("process", self.process, key="p", default=True)
+        else:
+            menu.add("process  (choose some actions)")
+        if analyzed and split:
+            if processable:
+                menu.add("send (process first)")
+            else:
+                menu.add("send", self.send_menu, key="s", default=True)
+        else:
+            menu.add("send (split first)")
+        if analyzed:
+            menu.add("show all details", self._show_details, key="d")
+        else:
+            menu.add("show all details (process first)")
+        menu.add("Refresh...", self.refresh_menu, key="r")
+        menu.add("Config...", self.config_menu, key="c")
+        menu.add("exit", self.close, key="x")
+        return menu
+
+    @staticmethod
+    def disable_modules():
+        for module in ["whois", "web", "nmap", "dig"]:
+            if Config.get(module, "FIELDS") is False:
+                if module == "dig":
+                    module = "dns"
+                getattr(TypeGroup, module).disable()
+
     def send_menu(self):
+        from .mailSender import MailSenderOtrs, MailSenderSmtp
         method = "smtp"
+        otrs_enabled = Config.get("otrs_enabled", "OTRS")
         if self.args.csirt_incident:
-            if Config.get("otrs_enabled", "OTRS"):
+            if otrs_enabled:
                 method = "otrs"
             else:
                 print("You are using csirt-incident macro but otrs_enabled key is set to False in config.ini. Exiting.")
                 quit()
-        elif Config.get("otrs_enabled", "OTRS"):
+        elif otrs_enabled:
             menu = Menu(title="What sending method do we want to use?", callbacks=False, fullscreen=True)
             menu.add("Send by SMTP...")
             menu.add("Send by OTRS...")
@@ -391,16 +448,14 @@ class Controller:
             sender = MailSenderSmtp(self.parser)
 
         info = ["In the next step, we connect to the server to send e-mails:"]
-        cond1 = cond2 = False
         st = self.parser.stats
-        if st["abuse_count"][0]:  # XX should be equal if just split by computed column! = self.csv.stats["ispCzFound"]:
+        abuse_n, partner_n = st["abuse_count"][0], st["partner_count"][0]  # not yet sent e-mails
+        if abuse_n:  # XX should be equal if just split by computed column! = self.csv.stats["ispCzFound"]:
             info.append(f" Template of a basic e-mail starts: \n\n{Contacts.mailDraft['local'].get_mail_preview()}\n")
-            cond1 = True
         else:
             info.append(" No non-partner e-mail in the set.")
-        if st["partner_count"][0]:  # self.csv.stats["countriesFound"]:
+        if partner_n:  # self.csv.stats["countriesFound"]:
             info.append(f" Template of a partner e-mail starts: \n\n{Contacts.mailDraft['foreign'].get_mail_preview()}\n")
-            cond2 = True
         else:
             info.append(" No partner e-mail in the set.")
 
@@ -409,12 +464,12 @@ class Controller:
             info.append("\n\n\n*** TESTING MOD - mails will be sent to the address: {} ***"
                         "\n (For turning off testing mode set `testing = False` in config.ini.)".format(Config.get('testing_mail')))
         menu = Menu("\n".join(info), callbacks=False, fullscreen=True, skippable=False)
-        if cond1 and cond2:
-            menu.add("Send both partner and other e-mails ({}×)".format(st["abuse_count"][0] + st["partner_count"][0]), key="both")
-        if cond2:
-            menu.add("Send partner e-mails ({}×)".format(st["partner_count"][0]), key="partner")
-        if cond1:
-            menu.add("Send non-partner e-mails ({}×)".format(st["abuse_count"][0]), key="basic")
+        if abuse_n and partner_n:
+            menu.add("Send both partner and other e-mails ({}×)".format(abuse_n + partner_n), key="both")
+        if partner_n:
+            menu.add("Send partner e-mails ({}×)".format(partner_n), key="partner")
+        if abuse_n:
+            menu.add("Send non-partner e-mails ({}×)".format(abuse_n), key="basic")
         if len(menu.menu) == 0:
             print("No e-mails in the set. Can't send. Continue to the main menu...")
             input()
@@ -444,18 +499,23 @@ class Controller:
         self.parser.run_analysis()
         self.wrapper.save()
 
-    def config_menu(self):
-        def start_debugger():
-            self.start_debugger = True
+    def _show_details(self):
+        self.parser.informer.sout_info(full=True)
+        input()
+
+    def _start_debugger(self):
+        self.start_debugger = True  # debugger starts in the main menu loop
 
+    def config_menu(self):
         menu = Menu(title="Config menu")
         menu.add("Edit configuration", self.edit_configuration)
         menu.add("Fetch whois for an IP", self.debug_ip)
-        menu.add("Start debugger", start_debugger)
+        menu.add("Start debugger", self._start_debugger)
         menu.sout()
 
     @staticmethod
     def edit_configuration(flags):
+        Config.assure_loaded()
         print("Opening {}... restart Convey when done.".format(Config.path))
         Config.edit_configuration(flags)
 
@@ -494,7 +554,6 @@ class Controller:
         if custom is None:
             # default [] would be evaluated at the time the function is defined, multiple columns may share the same function
             custom = []
-        dialog = Dialog(autowidgetsize=True)
         if not source_field or not source_type:
             print("\nWhat column we base {} on?".format(target_type))
             guesses = self.parser.identifier.get_fitting_source_i(target_type)
@@ -596,14 +655,13 @@ class Controller:
 
     def choose_cols(self):
         # XX possibility un/check all
-        chosens = [(str(i + 1), str(f), f.is_chosen) for i, f in enumerate(self.parser.fields)]
-        d = Dialog(autowidgetsize=True)
-        ret, values = d.checklist("What fields should be included in the output file?", choices=chosens)
+        fields = self.parser.fields
+        chosens = list(zip(map(str, range(1, len(fields) + 1)), map(str, fields), (f.is_chosen for f in fields)))
+        ret, values = dialog.checklist("What fields should be included in the output file?", choices=chosens)
         if ret == "ok":
-            for f in self.parser.fields:
-                f.is_chosen = False
-            for v in values:
-                self.parser.fields[int(v) - 1].is_chosen = True
+            chosen = {int(v) - 1 for v in values}
+            for i, f in enumerate(self.parser.fields):
+                f.is_chosen = i in chosen
             self.parser.is_processable = True
 
     def select_col(self, col_name="", only_computables=False, add=None):
@@ -636,21 +694,26 @@ class Controller:
         self.parser.is_processable = True
 
     def add_dialect(self):
-        dialect = type('', (), {})()
-        for k, v in self.parser.dialect.__dict__.copy().items():
-            setattr(dialect, k, v)
+        # output dialect is stored as csv.register_dialect keyword arguments so that it survives pickling
+        dialect = {k: getattr(self.parser.dialect, k) for k in
+                   ("delimiter", "quotechar", "escapechar", "doublequote", "skipinitialspace", "lineterminator")}
         # XX not ideal and mostly copies Parser.__init__ but this is a great start for a use case we haven't found yet
         # There might be a table with all the csv.dialect properties or so.
         while True:
             sys.stdout.write("What should be the delimiter: ")
-            dialect.delimiter = input()
-            if len(dialect.delimiter) != 1:
+            dialect["delimiter"] = input()
+            if len(dialect["delimiter"]) != 1:
                 print("Delimiter must be a 1-character string. Invent one (like ',').")
                 continue
             sys.stdout.write("What should be the quoting char: ")
-            dialect.quotechar = input()
+            dialect["quotechar"] = input() or None
+            dialect["quoting"] = csv.QUOTE_NONE if not dialect["quotechar"] else csv.QUOTE_MINIMAL
+            try:
+                csv.register_dialect(OUTPUT_DIALECT, **dialect)
+            except (csv.Error, TypeError) as e:
+                print(e)
+                continue
             break
-        dialect.quoting = csv.QUOTE_NONE if not dialect.quotechar else csv.QUOTE_MINIMAL
 
         self.parser.settings["dialect"] = dialect
         self.parser.is_processable = True
@@ -666,6 +729,7 @@ class Controller:
 
     def close(self):
         self.wrapper.save(last_chance=True)  # re-save cache file
+        self.wrapper.flush()
         if not Config.get("yes"):
             print("Finished.")
         exit(0)
@@ -1,5 +1,7 @@
 import logging
 from collections import defaultdict
+from heapq import heappop, heappush
+from itertools import count
 
 logger = logging.getLogger(__name__)
 
@@ -9,19 +11,19 @@ class Graph:
         self.nodes = set()
         self.edges = defaultdict(list)
         self.distances = {}
-
+        self._dijkstra_cache = {}  # (target, start, ignore_private) → dijkstra result, valid till the graph changes
 
     def add_node(self, value):
         self.nodes.add(value)
 
     def add_edge(self, to_node, from_node, distance=1):
+        self._dijkstra_cache.clear()
         self.edges[from_node].append(to_node)
         self.edges[to_node].append(from_node)
         self.add_node(from_node)
         self.add_node(to_node)
         self.distances[(from_node, to_node)] = distance
 
-    # @lru_cache(maxsize=512) XX is it a good performance tip?
     def dijkstra(self, target, start=None, ignore_private=False):
         """
         Performs Dijkstra's algorithm and returns
@@ -33,33 +35,37 @@ class Graph:
             :param target: Type
             :type start: Type
             :type ignore_private: bool
+
+        Results are cached till the next edge is added, do not modify them.
         """
+        key = target, start, ignore_private
+        try:
+            return self._dijkstra_cache[key]
+        except KeyError:
+            result = self._dijkstra_cache[key] = self._dijkstra(target, start, ignore_private)
+            return result
+
+    def _dijkstra(self, target, start, ignore_private):
         visited = {target: 0}
         tree = {}
 
-        nodes = set(self.nodes)
-
-        while nodes:
-            min_node = None
-            for node in nodes:
-                if node in visited:
-                    if min_node is None:
-                        min_node = node
-                    elif visited[node] < visited[min_node]:
-                        min_node = node
-
-            if min_node is None:
-                break
-
-            nodes.remove(min_node)
-            current_weight = visited[min_node]
-
-            for edge in self.edges[min_node]:
+        # the nearest node is popped from a heap instead of scanning all the nodes; with unit distances this is a BFS
+        queue = [(0, 0, target)]  # (weight, insertion order so that nodes never get compared, node)
+        order = count(1)
+        done = set()
+        while queue:
+            current_weight, _, min_node = heappop(queue)
+            if min_node in done:
+                continue
+            done.add(min_node)
+
+            for edge in self.edges.get(min_node, ()):
                 try:
                     weight = current_weight + self.distances[(min_node, edge)]
                     if edge not in visited or weight < visited[edge]:
                         visited[edge] = weight
                         tree[edge] = min_node
+                        heappush(queue, (weight, next(order), edge))
                 except KeyError:
                     pass
 
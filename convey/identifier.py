@@ -3,6 +3,7 @@ import itertools
 import logging
 import re
 from _csv import Error, reader
+from collections import Counter
 from copy import copy
 from csv import Sniffer
 from difflib import SequenceMatcher
@@ -14,7 +15,19 @@ from .types import Types, graph, methods, PickBase, TypeGroup, Type, methods_del
 logger = logging.getLogger(__name__)
 
 
+class KnownDialectSniffer(Sniffer):
+    """ Sniffer that does not sniff the dialect, it has been determined already. Used for has_header. """
+
+    def __init__(self, dialect):
+        super().__init__()
+        self.dialect = dialect
+
+    def sniff(self, sample, delimiters=None):
+        return self.dialect
+
+
 class Identifier:
+    _column_names = None  # (parser.first_line_fields, {column name: index}) built by get_column_i
 
     def __init__(self, parser):
         self.parser = parser
@@ -31,10 +44,17 @@ class Identifier:
         custom = copy(custom)
 
         def custom_code(e: str):
+            try:
+                compiled = compile(e, '', 'exec')
+            except SyntaxError as exception:  # reported for every value, as any other failure of the statement
+                compiled = exception
+
             def method(x):
-                l = locals()
+                l = {"x": x}
                 try:
-                    exec(compile(e, '', 'exec'), l)
+                    if isinstance(compiled, SyntaxError):
+                        raise compiled
+                    exec(compiled, l)
                 except Exception as exception:
                     code = "\n  ".join(e.split("\n"))
                     logger.error(f"Statement failed with {exception}.\n  x = '{x}'; {code}")
@@ -48,6 +68,9 @@ class Identifier:
 
         def regex(type_, search, replace=None):
             search = re.compile(search)
+            if replace and type_ == Types.reg_s:
+                # we convert "str{0}" → "\g<0>" (works better than conversion to a mere "\0" that may result to ambiguity
+                substitution = re.sub(r"{(\d+)}", r"\\g<\1>", replace)
 
             def reg_m_method(s):
                 match = search.search(s)
@@ -73,8 +96,7 @@ class Identifier:
                 if not replace:
                     return search.sub("", s)
                 try:
-                    # we convert "str{0}" → "\g<0>" (works better than conversion to a mere "\0" that may result to ambiguity
-                    return search.sub(re.sub("{(\d+)}", r"\\g<\1>", replace), s)
+                    return search.sub(substitution, s)
                 except re.error:
                     logger.error(f"RegExp failed: `{replace}` cannot be used to substitute `{s}` with `{search}`")
                     if not Config.error_caught():
@@ -115,26 +137,40 @@ class Identifier:
 
     @staticmethod
     def get_sample(source_file):
-        sample = []
-        first_line = ""
         with open(source_file, 'r') as csv_file:
-            for i, row in enumerate(csv_file):
-                if i == 0:
-                    first_line = row
-                sample.append(row)
-                if i == 8:  # sniffer needs 7+ lines to determine dialect, not only 3 (/mnt/csirt-rook/2015/06_08_Ramnit/zdroj), I dont know why
-                    break
-        return first_line.strip(), sample
+            # sniffer needs 7+ lines to determine dialect, not only 3 (/mnt/csirt-rook/2015/06_08_Ramnit/zdroj), I dont know why
+            sample = list(itertools.islice(csv_file, 9))
+        return (sample[0].strip() if sample else ""), sample
         # csvfile.seek(0)
         # csvfile.close()
 
+    @staticmethod
+    def _consistent_delimiter(sample):
+        """ Return (delimiter, skipinitialspace) if a common delimiter occurs equally often on every line, else None.
+            For a sample without quotes, this is what Sniffer.sniff would conclude, at the cost of a few str.count calls. """
+        lines = [line for line in (row.rstrip("\n") for row in sample) if line]
+        if not lines or any(q in line for line in lines for q in "'\""):
+            return None
+        for dl in (",", "\t", ";"):  # in the order of Sniffer.preferred
+            counts = {line.count(dl) for line in lines}
+            if len(counts) == 1 and 0 not in counts:
+                return dl, lines[0].count(dl) == lines[0].count(dl + " ")
+
     @staticmethod
     def guess_dialect(sample):
         sniffer = Sniffer()
         sample_text = "".join(sample)
         try:
-            dialect = sniffer.sniff(sample_text)
-            has_header = sniffer.has_header(sample_text)
+            consistent = Identifier._consistent_delimiter(sample)
+            if consistent:
+                # the same attributes Sniffer gives to its dialect (Parser pickles them from the class __dict__)
+                dialect = type("dialect", (csv.Dialect,), {"_name": "sniffed", "lineterminator": "\r\n",
+                                                           "quoting": csv.QUOTE_MINIMAL, "doublequote": False,
+                                                           "delimiter": consistent[0], "quotechar": '"',
+                                                           "skipinitialspace": consistent[1]})
+            else:
+                dialect = sniffer.sniff(sample_text)
+            has_header = KnownDialectSniffer(dialect).has_header(sample_text)  # not sniffing the sample again
             if re.match("[a-z]", dialect.delimiter.lower()):  # we do not allow letters to be delimiters, seems like non-sense
                 raise Error
         except Error:  # delimiter failed – maybe there is an empty column: "89.187.1.81,06-05-2016,,CZ,botnet drone"
@@ -197,7 +233,7 @@ class Identifier:
         :type quiet: bool If True, we do not raise exception when sample cannot be processed.
                             Ex: We attempt consider user input "1,2,3" as single field which is not, we silently return False
         """
-        samples = [[] for _ in self.parser.fields]
+        samples = [Counter() for _ in self.parser.fields]  # sample values of every column and their occurrences
         if len(self.parser.sample) == 1:  # we have too few values, we have to use them
             s = self.parser.sample[:1]
         else:  # we have many values and the first one could be header, let's omit it
@@ -206,7 +242,7 @@ class Identifier:
         for row in reader(s, dialect=self.parser.dialect) if self.parser.dialect else [s]:
             for i, val in enumerate(row):
                 try:
-                    samples[i].append(val)
+                    samples[i][val] += 1
                 except IndexError:
                     if not quiet:
                         print("It seems rows have different lengths. Cannot help you with column identifying.")
@@ -218,12 +254,18 @@ class Identifier:
 
         for i, field in enumerate(self.parser.fields):
             possible_types = {}
+            header = Type.normalize_header(field) if self.parser.has_header else None  # once per field, not per type
             for type_ in Types.get_guessable_types():
-                score = type_.check_conformity(samples[i], self.parser.has_header, field)
+                score = type_.check_conformity(samples[i], header)
                 if score:
                     possible_types[type_] = score
                 # print("hits", hits)
 
+            # a more specific type found makes the generic one redundant
+            if Types.any_ip in possible_types and (Types.ip in possible_types or Types.port_ip in possible_types):
+                del possible_types[Types.any_ip]
+            if Types.url in possible_types and Types.wrong_url in possible_types:
+                del possible_types[Types.url]
             if possible_types:  # sort by biggest score - biggest probability the column is of this type
                 field.possible_types = {k: v for k, v in sorted(possible_types.items(), key=lambda k: k[1], reverse=True)}
         return True
@@ -232,9 +274,9 @@ class Identifier:
         """ Loops all types the field could be and return the type best suited method for compute new field. """
         _min = 999
         fitting_type = None
-        possible_fields = list(self.parser.fields[source_field_i].possible_types)
+        possible_types = self.parser.fields[source_field_i].possible_types
         dijkstra = graph.dijkstra(target_field)  # get all fields that new_field is computable from
-        for _type in possible_fields:
+        for _type in possible_types:
             # loop all the types the field could be, loop from the FieldType we think the source_col correspond the most
             # a column may have multiple types (url, hostname), use the best
             if _type not in dijkstra:
@@ -255,12 +297,14 @@ class Identifier:
         """
         possible_cols = {}
         if target_type.group != TypeGroup.custom:
-            valid_types = graph.dijkstra(target_type)
-            for val in valid_types:  # loop from the best suited type
-                for i, f in enumerate(self.parser.fields):  # loop from the column we are most sure with its field type
-                    if val in f.possible_types:
-                        possible_cols[i] = f.possible_types[val]
-                        break
+            first_col = {}  # [type] = (i, score) of the first column that may be of the type
+            for i, f in enumerate(self.parser.fields):
+                for type_, score in f.possible_types.items():
+                    first_col.setdefault(type_, (i, score))
+            for val in graph.dijkstra(target_type):  # loop from the best suited type
+                if val in first_col:
+                    i, score = first_col[val]
+                    possible_cols[i] = score
         if not possible_cols and try_hard and target_type.is_plaintext_derivable:
             # because any plaintext would do (and no plaintext-only type has been found), take the first column
             possible_cols = [0]
@@ -332,8 +376,8 @@ class Identifier:
                     possibles[i] = t.possible_types[source_type]
 
             try:
-                source_col_i = sorted(possibles, key=possibles.get, reverse=True)[0]
-            except IndexError:
+                source_col_i = max(possibles, key=possibles.get)
+            except ValueError:
                 print(f"No suitable column of type '{source_type}' found to make field '{target_type}'")
                 quit()
 
@@ -366,20 +410,29 @@ class Identifier:
             print(f"Preparing type {target_type} of field={f}, source_type={source_type}, custom={task}, path={path}")
         return f, source_type, task
 
+    def resolve_columns(self, columns):
+        """
+        Resolve multiple user input COLUMNs at once, see get_column_i.
+        :rtype: Dict[str, int] {column: column_i or None if not found}
+        """
+        return {c: self.get_column_i(c) for c in columns}
+
     def get_column_i(self, column):
         """
         Useful for parsing user input COLUMN from the CLI args.
         :type column: object Either column ID (ex "1" points to column index 0) or an exact column name or the field
         :rtype: int Either column_i or None if not found.
         """
-        source_col_i = None
         if hasattr(column, "col_i"):
             return column.col_i
         if column.isdigit():  # number of column
-            source_col_i = int(column) - 1
-        elif column in self.parser.first_line_fields:  # exact column name
-            source_col_i = self.parser.first_line_fields.index(column)
-        else:
+            return int(column) - 1
+        fields = self.parser.first_line_fields
+        if not self._column_names or self._column_names[0] is not fields:
+            # the first occurrence wins, as with list.index
+            self._column_names = fields, {name: i for i, name in reversed(list(enumerate(fields)))}
+        source_col_i = self._column_names[1].get(column)  # exact column name
+        if source_col_i is None:
             searched_type = Types.find_type(column)  # get field by its type
             if searched_type:
                 reserve = None
@@ -2,6 +2,7 @@ import csv
 import subprocess
 import sys
 from _datetime import datetime
+from functools import partial
 from math import ceil
 from pathlib import Path
 
@@ -112,7 +113,7 @@ class Informer:
             else:
                 # print the rows in the same way so that they optically match the Sample above
                 print("\033[0;36mCompact preview:\033[0m")
-                cw = csv.writer(sys.stdout, dialect=self.csv.settings["dialect"] or self.csv.dialect)
+                cw = csv.writer(sys.stdout, dialect=self.csv.get_output_dialect())
                 cw.writerow([f.get() for f in self.csv.fields])
                 for r in full_rows:
                     cw.writerow(r)
@@ -241,12 +242,13 @@ class Informer:
         """
         size = Path(source_file).stat().st_size
         if size < 100 * 10 ** 6:
-            p = subprocess.Popen(['wc', '-l', source_file], stdout=subprocess.PIPE,
-                                 stderr=subprocess.PIPE)
-            result, err = p.communicate()
-            if p.returncode != 0:
-                raise IOError(err)
-            return int(result.strip().split()[0]), size
+            if size > 1 << 20:  # wc is several times faster than counting in Python but spawning it takes about a millisecond
+                try:
+                    return int(subprocess.check_output(["wc", "-l", source_file], stderr=subprocess.DEVNULL).split()[0]), size
+                except (OSError, subprocess.CalledProcessError):  # wc not available, ex: on Windows
+                    pass
+            with open(source_file, "rb") as f:
+                return sum(chunk.count(b"\n") for chunk in iter(partial(f.read, 1 << 20), b"")), size
         else:
             # bytes / average number of characters on line in sample
             return ceil(size / (len("".join(self.csv.sample)) / len(self.csv.sample)) / 1000000) * 1000000, size
@@ -8,6 +8,7 @@ from .config import Config, get_path
 class MailDraft:
     def __init__(self, filename):
         self.text = False
+        self._file_text = None, None  # (file metadata, contents) of the last mail_file read
         self.template_file = get_path(filename)
         self.mail_file = Path(Config.get_cache_dir(), filename)  # ex: csirt/2015/mail_cz5615616.txt XMailDraft.dir +  + MailDraft.hash
 
@@ -26,7 +27,10 @@ class MailDraft:
             return ""
 
     def get_mail_preview(self) -> str:
-        return (self.get_subject() + ": " + self.get_body()[0:50] + "... ").replace("\n", " ").replace("\r", " ")
+        if not self._assure_mail_contents():
+            return ":... "
+        lines = self.text.splitlines()  # the same as get_subject() and get_body() but with a single file check
+        return (lines[0] + ": " + '\r\n'.join(lines[1:])[0:50] + "... ").replace("\n", " ").replace("\r", " ")
 
     def _assure_mail_contents(self):
         self.text = self._load_text()
@@ -47,12 +51,19 @@ class MailDraft:
         return True
 
     def _load_text(self):
-        """Loads body text and subject from the file."""
+        """Loads body text and subject from the file. The file is re-read only when it changes (ex: edited in GUI)."""
         try:
-            with open(self.mail_file, 'r') as f:
-                return f.read()
+            st = self.mail_file.stat()
         except FileNotFoundError:
             return None
+        key = st.st_mtime_ns, st.st_size
+        if self._file_text[0] != key:
+            try:
+                with open(self.mail_file, 'r') as f:
+                    self._file_text = key, f.read()
+            except FileNotFoundError:
+                return None
+        return self._file_text[1]
 
     def gui_edit(self):
         """ Opens file for mail text to GUI editing. Created from the template if had not existed before. """
@@ -1,8 +1,10 @@
 # Source file parsing
 import csv
 import datetime
+import io
 import logging
-import re
+import os
+import string
 import subprocess
 import time
 from collections import defaultdict
@@ -10,7 +12,6 @@ from itertools import zip_longest
 from json import dumps
 from math import ceil, inf
 from pathlib import Path
-from shutil import move
 from typing import List
 
 from tabulate import tabulate
@@ -20,11 +21,14 @@ from .contacts import Contacts, Attachment
 from .dialogue import Cancelled, is_yes, ask
 from .identifier import Identifier
 from .informer import Informer
-from .processor import Processor
-from .types import Types, Type, Web, TypeGroup, Checker
+from .processor import Processor, OUTPUT_DIALECT
+from .types import Types, Type, Web, TypeGroup, Checker, compile_dfa
 from .whois import Whois
 
 logger = logging.getLogger(__name__)
+NEWLINES_DELETE = str.maketrans("", "", "\r\n")
+BASE64_ALPHABET = (string.ascii_letters + string.digits + "+/=\r\n").encode("ascii")  # including the line breaks
+reQuopri = compile_dfa(r"=[A-Z0-9]{2}")  # quoted-printable escape sequence
 
 
 class Parser:
@@ -77,12 +81,13 @@ class Parser:
         self.processor = Processor(self)
         self.informer = Informer(self)
         self.identifier = Identifier(self)
+        Checker.clear_cache()
 
         if stdin:  # we're analysing an input text
             self.set_stdin(stdin)
         else:  # we're analysing a file on disk
+            self.first_line, self.sample = self.identifier.get_sample(self.source_file)  # a big file length is guessed from it
             self.lines_total, self.size = self.informer.source_file_len(self.source_file)
-            self.first_line, self.sample = self.identifier.get_sample(self.source_file)
 
 
         self.refresh()
@@ -108,23 +113,29 @@ class Parser:
             seems = True
 
             def join_base(s):
-                return "".join(s).replace("\n", "").replace("\r", "")
+                return "".join(s).translate(NEWLINES_DELETE)
+
+            def is_base64_alphabet(s):
+                try:  # deleting the alphabet from bytes is faster than from str
+                    return not "".join(s).encode("ascii").translate(None, BASE64_ALPHABET)
+                except UnicodeEncodeError:  # base64 is ASCII only
+                    return False
 
             def join_quo(s):
                 return "".join(s).replace("=\n", "").replace("=\r", "").replace("\n", r"\n").replace("\r", r"\r")
 
             len_ = len(self.sample)
-            if len_ > 1 and re.search("[^A-Za-z0-9+/=]", join_base(self.sample)) is None:
+            if len_ > 1 and is_base64_alphabet(self.sample):
                 # in the sample, there is just base64-chars
                 s = join_base(self.stdin)
                 seems = False
                 try:
-                    if Checker.is_base64(s):  # all the input is base64 decodable
+                    if Checker.decodes_base64(s):  # all the input is base64 decodable (not cached, it may be huge)
                         seems = True
                         self.set_stdin([s])
                 except ValueError:
                     pass
-            elif len_ > 1 and re.search("=[A-Z0-9]{2}", join_quo(self.sample)):
+            elif len_ > 1 and reQuopri.search(join_quo(self.sample)):
                 s = join_quo(self.stdin)
 
                 seems = False
@@ -223,12 +234,7 @@ class Parser:
             if field.is_new:
                 s = f"computed from: {field.source_type}"
             elif field.possible_types:
-                types = field.possible_types
-                if Types.any_ip in types and (Types.ip in types or Types.port_ip in types):
-                    del types[Types.any_ip]
-                if Types.url in types and Types.wrong_url in types:
-                    del types[Types.url]
-                s = f"detected: {', '.join((str(e) for e in types))}"
+                s = f"detected: {', '.join(map(str, field.possible_types))}"
                 if append_values:
                     s += " – values: " + ", ".join(field.get_samples(3))
             fields.append((field, s))
@@ -296,8 +302,9 @@ class Parser:
                 types = [Types.plaintext]
             else:  # loop all existing methods
                 types = Types.get_computable_types(ignore_custom=True)
+            ignored = frozenset(Config.get("single_query_ignored_fields", "FIELDS", get=list))  # Type hashes as its name
             for target_type in types:
-                if target_type in Config.get("single_query_ignored_fields", "FIELDS", get=list):
+                if target_type in ignored:
                     # do not automatically compute ignored fields
                     continue
                 elif target_type.group == TypeGroup.custom:
@@ -315,10 +322,10 @@ class Parser:
             else:
                 val = self.sample_parsed[0][field.source_field.col_i]
             try:
-                for i, l in enumerate(methods):
-                    val_old = val
-                    if (repr((val, methods[:i+1]))) in method_cache:
-                        val = method_cache[(repr((val, methods[:i+1])))]
+                for l in methods:
+                    key = repr(val), l
+                    if key in method_cache:
+                        val = method_cache[key]
                         continue
                     if isinstance(val, list):
                         # resolve all items, while flattening any list encountered
@@ -327,7 +334,7 @@ class Parser:
                         val = l(val)
                     # We cache this value so that it will not be recomputed when crawling the same path on the graph again.
                     # Ex: `hostame → ip → country` and `hostname → ip → asn` will not call method `hostname → ip` twice (for each).
-                    method_cache[(repr((val, methods[:i+1])))] = val
+                    method_cache[key] = val
             except Exception as e:
                 val = str(e)
             self.sample_parsed[0].append(val)
@@ -391,14 +398,9 @@ class Parser:
         self.queued_lines_count = self.invalid_lines_count = 0
 
         if self.dialect:
-            class Wr:  # very ugly way to correctly get the output from csv.writer
-                def write(self, row):
-                    self.written = row
-
-            wr = Wr()
-            cw = csv.writer(wr, dialect=self.dialect)
-            cw.writerow([f for f in self.fields if f.is_chosen])
-            self.header = wr.written
+            buffer = io.StringIO()
+            csv.writer(buffer, dialect=self.dialect).writerow([f for f in self.fields if f.is_chosen])
+            self.header = buffer.getvalue()
         self._reset_output()
         # self.get_sample_values()  # assure sout_info would consume a result from duplicate_row
 
@@ -411,8 +413,16 @@ class Parser:
         self.attachments.clear()
         self.reset_whois(hard=hard)
 
+    def get_output_dialect(self):
+        """ Dialect the output is written in: the user-changed one (registered under OUTPUT_DIALECT) or the source one. """
+        if not self.settings["dialect"]:
+            return self.dialect
+        csv.register_dialect(OUTPUT_DIALECT, **self.settings["dialect"])
+        return OUTPUT_DIALECT
+
     def prepare_target_file(self):
-        if not self.settings["split"] and self.settings["split"] is not 0:  # 0 is a valid column
+        split = self.settings["split"]
+        if not split and type(split) is not int:  # 0 is a valid column (but False, a bool, is not)
             self.target_file = self.invent_file_str()
             self.is_split = False
         else:
@@ -449,7 +459,8 @@ class Parser:
             Contacts.mailDraft["local"].gui_edit()
             Contacts.mailDraft["foreign"].gui_edit()
 
-        self.time_start = self.time_last = datetime.datetime.now().replace(microsecond=0)
+        self.time_start = datetime.datetime.now().replace(microsecond=0)  # displayed to the user
+        self.time_last = time.monotonic()  # measures the velocity
         self.refresh()
         # Config.update()
         self.prepare_target_file()
@@ -507,7 +518,7 @@ class Parser:
         self.reset_whois(assure_init=True, slow_mode=slow_mode, unknown_mode=unknown_mode)
         temp = str(path) + ".running.tmp"
         try:
-            move(path, temp)
+            os.replace(path, temp)  # the same directory, a mere rename
         except FileNotFoundError:
             input("File {} not found, maybe resolving was run in the past and failed. Please rerun again.".format(path))
             return False
@@ -667,12 +678,15 @@ class Parser:
     def get_sample_values(self):
         rows = []  # nice table formatting
         full_rows = []  # formatting that optically matches the Sample above
+        methods = {}  # [col_i] = methods computing the field, got once for all the lines
         for l in self.sample_parsed:
             row = []
             full_row = []
-            for f, c in zip_longest(self.fields, l):
+            for i, (f, c) in enumerate(zip_longest(self.fields, l)):
                 if c is None:
-                    c = f.compute_preview(l)
+                    if i not in methods:
+                        methods[i] = f.get_preview_methods()
+                    c = f.compute_preview(l, methods[i])
                 row.append(f.color(c, True))
                 full_row.append(f.color(c))
             rows.append(row)
@@ -740,7 +754,8 @@ class Field:
             return _
 
         transposed = list(zip(*p.sample_parsed))
-        list(map(swap(i, i2), [p.fields, transposed]))
+        for it in (p.fields, transposed):
+            swap(i, i2)(it)
         p.sample_parsed = list(map(list, zip(*transposed)))
 
     def toggle_chosen(self):
@@ -811,26 +826,33 @@ class Field:
             res = [self.parser.sample_parsed[line][self.col_i] for line in
                    range(0, c)]
         except IndexError:
-            rows = []
-            for l in self.parser.sample_parsed[slice(None, c)]:
-                rows.append(self.compute_preview(l))
-            res = rows
+            methods = self.get_preview_methods()
+            res = [self.compute_preview(l, methods) for l in self.parser.sample_parsed[slice(None, c)]]
         if supposed_type and supposed_type.is_plaintext_derivable:
-            rows, res = res.copy(), []
+            methods = self.get_methods(Types.bytes if target_type == Types.charset else Types.plaintext, self.type)
+            rows, res = res, []
             for c in rows:
-                for m in self.get_methods(Types.bytes if target_type == Types.charset else Types.plaintext, self.type):
+                for m in methods:
                     c = m(c)
                 res.append(c)
         return res
 
-    def compute_preview(self, source_line):
+    def get_preview_methods(self):
+        """ Methods compute_preview uses (None if there is no preview) so that they are got once for all the sample lines. """
+        if Config.get("compute_preview") and self.source_field:
+            return self.get_methods()
+
+    def compute_preview(self, source_line, methods=None):
+        """
+        :param methods: The methods computing this field, when already got for the other sample lines.
+        """
         if Config.get("compute_preview") and self.source_field:
             c = source_line[self.source_field.col_i]
             if c is None:
                 # source column has not yet been resolved because of column resorting
                 # (note this will not a problem when processing)
                 return "..."
-            for l in self.get_methods():
+            for l in methods if methods is not None else self.get_methods():
                 if isinstance(c, list):
                     # resolve all items, while flattening any list encountered
                     c = [y for x in (l(v) for v in c) for y in (x if type(x) is list else [x])]
@@ -5,25 +5,53 @@ import traceback
 from bdb import BdbQuit
 from collections import defaultdict
 from csv import reader as csvreader, writer as csvwriter
-from datetime import datetime
 from functools import reduce
+from itertools import islice
 from math import ceil
 from pathlib import Path
+from time import monotonic
 from typing import Dict
 
 from .config import Config
 from .contacts import Attachment
 from .dialogue import ask
-from .types import Web
+from .types import Checker, Web, nmap, nmap_many
 from .whois import Quota, Whois
 
 logger = logging.getLogger(__name__)
+OUTPUT_DIALECT = "convey_output"  # name the user-changed output dialect is registered under
+PREFETCH_ROWS = 1000  # lines whose slow values are computed at once before they get processed
+TYPES_MODULE = Web.__module__  # see is_offline
+# slow method → its batch version run before processing lines
+PREFETCHERS = {Web: Web.fetch_many, nmap: nmap_many,
+               Checker.hostname_ip: Checker.hostname_ip_many, Checker.hostname_ips: Checker.hostname_ips_many}
+
+
+def is_offline(method):
+    """ The conversions defined in types compute without a request, except for those marked slow. """
+    return getattr(method, "__module__", None) == TYPES_MODULE and not getattr(method, "slow", False)
 
 
 def prod(iterable):  # XX as of Python3.8, replace with math.prod
     return reduce(operator.mul, iterable, 1)
 
 
+def fuse(methods):
+    """ Compose the methods into a single function so that a line pays one call instead of looping the methods.
+        The source cell is a string; once a method returns a list, the next ones resolve all its items,
+        while flattening any list encountered. """
+    if len(methods) == 1:
+        return methods[0]
+    src = ["def fused(x):"]
+    for i in range(len(methods)):
+        src.append(f"    x = [y for r in map(_m{i}, x) for y in (r if type(r) is list else [r])]"
+                   f" if isinstance(x, list) else _m{i}(x)")
+    src.append("    return x")
+    namespace = {f"_m{i}": m for i, m in enumerate(methods)}
+    exec("\n".join(src), namespace)
+    return namespace["fused"]
+
+
 class Processor:
     """ Opens the CSV file and processes the lines. """
 
@@ -53,18 +81,19 @@ class Processor:
 
         # apply setup
         adds = []  # convert settings["add"] to lambdas
-        for f in settings["add"]:  # [("netname", 20, [lambda x, lambda x...]), ...]
-            adds.append((f.name, f.source_field.col_i_original, f.get_methods()))
+        for f in settings["add"]:  # [("netname", 20, [lambda x, lambda x...], fused lambdas), ...]
+            methods = f.get_methods()
+            adds.append((f.name, f.source_field.col_i_original, methods, fuse(methods)))
         del settings["add"]
         settings["addByMethod"] = adds
 
         if [f for f in self.csv.fields if (not f.is_chosen or f.col_i_original != f.col_i)]:
             settings["chosen_cols"] = [f.col_i_original for f in self.csv.fields if f.is_chosen]
 
-        if not settings["dialect"]:
-            settings["dialect"] = csv.dialect
+        settings["dialect"] = csv.get_output_dialect()
 
         Web.init(self.csv.get_computed_fields())
+        prefetch_levels = self._get_prefetch_levels(settings)
 
         # start file processing
         try:
@@ -80,13 +109,14 @@ class Processor:
             reader = csvreader(source_stream, dialect=csv.dialect)
             if csv.has_header:  # skip header
                 reader.__next__()
-            for row in reader:
+            process_line = self.process_line  # looked up once, not for every line
+            for row in self._prefetch(reader, prefetch_levels):
                 if not row:  # skip blank
                     continue
                 csv.line_count += 1
                 if csv.line_count == csv.line_sout:
-                    now = datetime.now()
-                    delta = (now - csv.time_last).total_seconds()
+                    now = monotonic()
+                    delta = now - csv.time_last
                     csv.time_last = now
                     if delta < 1 or delta > 2:
                         new_vel = ceil(csv.velocity / delta) + 1
@@ -99,7 +129,7 @@ class Processor:
                     csv.informer.sout_info()
                     Whois.quota.check_over()
                 try:
-                    self.process_line(csv, row, settings)
+                    process_line(csv, row, settings)
                 except BdbQuit:  # not sure if working, may be deleted
                     print("BdbQuit called")
                     raise
@@ -156,6 +186,51 @@ class Processor:
         for f in self.descriptors.values():
             f[0].close()
 
+    @staticmethod
+    def _get_prefetch_levels(settings):
+        """ Group the prefetched methods of the added fields by their order in the method chain.
+            :return: [[(col_i, chain prefix fused, prefetched method), ...] for the first ones, ... for the second ones, ...]
+        """
+        levels = []
+        for _, col_i, methods, _ in settings["addByMethod"]:
+            depth = 0
+            for i, method in enumerate(methods):
+                if method in PREFETCHERS:
+                    if depth == len(levels):
+                        levels.append([])
+                    levels[depth].append((col_i, fuse(methods[:i]), method))
+                    depth += 1
+                elif not is_offline(method):
+                    break  # a longer prefix would run this slow method serially
+        return levels
+
+    @staticmethod
+    def _prefetch(rows, levels):
+        """ Yield the rows back, having computed chunk by chunk, in parallel, the slow values (web pages, nmap scans, DNS)
+            the added fields need, so that the lines are then answered from the caches rather than one by one.
+            The levels are fetched in order so that ex: hostname → ip → ports computes the IPs from the cache. """
+        if not levels:
+            yield from rows
+            return
+        for chunk in iter(lambda: list(islice(rows, PREFETCH_ROWS)), []):
+            for level in levels:
+                values = defaultdict(set)  # prefetched method → values
+                for col_i, prefix, method in level:
+                    vals = values[method]
+                    for row in chunk:
+                        if not row:
+                            continue
+                        try:
+                            val = prefix(row[col_i])
+                        except Exception as e:  # the line fails again while being processed and is reported then
+                            logger.debug(f"Not prefetching {method} for {row}: {e}")
+                            continue
+                        vals.update(v for v in (val if isinstance(val, list) else [val]) if v)
+                for method, vals in values.items():
+                    if vals:
+                        PREFETCHERS[method](vals)
+            yield from chunk
+
     def process_line(self, csv, line, settings, fields=None):
         """
         Parses line – compute fields while adding, perform filters, pick or delete cols, split and write to a file.
@@ -164,19 +239,13 @@ class Processor:
             if not fields:
                 fields = line.copy()
 
-                if len(fields) is not len(csv.first_line_fields):
+                if len(fields) != len(csv.first_line_fields):
                     raise ValueError("Invalid number of line fields: {}".format(len(fields)))
 
                 # add fields
                 list_lengths = []
-                for col in settings["addByMethod"]:  # [("netname", 20, [lambda x, lambda x...]), ...]
-                    val = fields[col[1]]
-                    for l in col[2]:
-                        if isinstance(val, list):
-                            # resolve all items, while flattening any list encountered
-                            val = [y for x in (l(v) for v in val) for y in (x if type(x) is list else [x])]
-                        else:
-                            val = l(val)
+                for col in settings["addByMethod"]:  # [("netname", 20, [lambda x, lambda x...], fused lambdas), ...]
+                    val = col[3](fields[col[1]])
                     fields.append(val)
                     if isinstance(val, list):
                         list_lengths.append(len(val))
@@ -3,17 +3,22 @@ import importlib.util
 import inspect
 import ipaddress
 import logging
+import os
 import re
+import shutil
 import socket
+import stat
 import subprocess
 from abc import ABC, abstractmethod, ABCMeta
 from base64 import b64decode, b64encode
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from builtins import ZeroDivisionError
 from copy import copy
 from datetime import datetime
 from enum import IntEnum
-from pathlib import Path
+from functools import lru_cache
 from quopri import decodestring, encodestring
+from string import hexdigits
 from threading import Thread
 from typing import List, Callable
 from urllib.parse import unquote, quote, urlparse, urlsplit
@@ -24,6 +29,7 @@ from bs4 import BeautifulSoup
 from chardet import detect
 from netaddr import IPRange, IPNetwork
 from pint import UnitRegistry
+from requests.adapters import HTTPAdapter
 from validate_email import validate_email
 
 from .config import Config
@@ -32,13 +38,35 @@ from .graph import Graph
 from .infodicts import is_phone, phone_country, address_country, country_codes
 from .whois import Whois
 
+try:
+    import re2  # optional linear-time engine, see compile_dfa
+except ImportError:
+    re2 = None
+
 logger = logging.getLogger(__name__)
 
-reIpWithPort = re.compile("((\d{1,3}\.){4})(\d+)")
-reAnyIp = re.compile("\"?((\d{1,3}\.){3}(\d{1,3}))")
-reFqdn = re.compile(
-    "(?=^.{4,253}$)(^((?!-)[a-zA-Z0-9-]{1,63}(?<!-)\.)+[a-zA-Z]{2,63}$)")  # Xtoo long, infinite loop: ^(((([A-Za-z0-9]+){1,63}\.)|(([A-Za-z0-9]+(\-)+[A-Za-z0-9]+){1,63}\.))+){1,255}$
-reUrl = re.compile('[htps]*://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+
+def compile_dfa(pattern):
+    """ Compile with RE2 when available. Pattern must not use lookarounds nor backreferences (RE2 lacks them).
+        RE2 classes like \\d are ASCII-only by itself, so the result matches the same as with re.ASCII. """
+    return re2.compile(pattern) if re2 else re.compile(pattern, re.ASCII)
+
+
+reIpWithPort = compile_dfa(r"((\d{1,3}\.){4})(\d+)")  # IP in the form 1.2.3.4.port, hence four dots
+reAnyIp = compile_dfa(r"\"?((\d{1,3}\.){3}(\d{1,3}))")
+# labels of 1–63 chars not starting nor ending with a hyphen; use is_fqdn, the total length is checked there
+reFqdn = compile_dfa(r"(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,63}")
+# Xtoo long, infinite loop: ^(((([A-Za-z0-9]+){1,63}\.)|(([A-Za-z0-9]+(\-)+[A-Za-z0-9]+){1,63}\.))+){1,255}$
+reUrl = compile_dfa(r'[htps]*://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+reBlankLines = re.compile(r'\n\s*\n')
+reSpaces = re.compile(r'[^\S\r\n]{2,}')  # multiple spaces, not new lines
+reRefreshUrl = re.compile(r"http[^\"'\s]*")
+reLetter = re.compile(r"[A-Za-z]")
+reDigits = re.compile(r"\d*")
+reNumber = re.compile(r"\d+")
+rePort = re.compile(r"\d{1,5}")
+reAsn = re.compile(r"AS\d+")
+reCharset = re.compile(rb"""charset=["']?([\w-]+)""", re.IGNORECASE)
 
 # reBase64 = re.compile('^([A-Za-z0-9+/]{4})*([A-Za-z0-9+/]{4}|[A-Za-z0-9+/]{3}=|[A-Za-z0-9+/]{2}==)$')
 
@@ -137,9 +165,27 @@ class PickInput(PickBase):
         self.parameter_name = par[1]
 
 
+def is_fqdn(s):
+    """ True, if s is a well formatted domain name """
+    return 4 <= len(s) <= 253 and reFqdn.fullmatch(s) is not None
+
+
+IP_FIRST_CHARS = frozenset(hexdigits + ":")  # any IPv4 or IPv6 address starts with one of these
+
+
+@lru_cache(maxsize=1 << 16)
 def is_ip(ip):
     """ True, if IP is well formatted IPv4 or IPv6 """
+    if not ip or ip[0] not in IP_FIRST_CHARS:
+        return False
+    # inet_pton is a single C call, unlike ipaddress which parses in Python and raises on every failure
     try:
+        socket.inet_pton(socket.AF_INET6 if ":" in ip else socket.AF_INET, ip)
+        return True
+    except (OSError, ValueError):  # ValueError on an embedded null character
+        if "%" not in ip:
+            return False
+    try:  # scoped IPv6 "fe80::1%eth0" is not understood by inet_pton
         ipaddress.ip_address(ip)
         return True
     except ValueError:
@@ -181,11 +227,23 @@ def timeout(seconds: int, function: Callable, *args, **kwargs):
         return result[0]
 
 
+def run_many(method, vals, workers):
+    """ Call the method for the values in parallel so that its cache is filled.
+        A failed value stays uncached, its line computes it again then. """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(method, val): val for val in vals}
+        for future in as_completed(futures):
+            e = future.exception()
+            if e:
+                logger.warning(f"Prefetching {method.__name__} of {futures[future]} failed: {e!r}", exc_info=e)
+
+
 class Checker:
     """ To not pollute the namespace, we put the methods here """
 
     hostname_ips_cache = {}
     hostname_cache = {}
+    dns_workers = 64  # DNS is IO-bound, resolve many hostnames at once
 
     @staticmethod
     def hostname_ips(val):
@@ -205,24 +263,56 @@ class Checker:
                 cls.hostname_cache[val] = []
         return cls.hostname_cache[val]
 
+    @classmethod
+    def hostname_ips_many(cls, vals):
+        """ Resolve the not yet resolved hostnames in parallel so that the subsequent hostname_ips calls hit the cache. """
+        cls._resolve_many(cls.hostname_ips, {val for val in vals if val not in cls.hostname_ips_cache})
+
+    @classmethod
+    def hostname_ip_many(cls, vals):
+        """ Resolve the not yet resolved hostnames in parallel so that the subsequent hostname_ip calls hit the cache. """
+        cls._resolve_many(cls.hostname_ip, {val for val in vals if val not in cls.hostname_cache})
+
+    @classmethod
+    def _resolve_many(cls, method, vals):
+        if vals:
+            logger.info(f"Resolving {len(vals)} hostnames...")
+            run_many(method, vals, cls.dns_workers)
+
     @staticmethod
+    @lru_cache(maxsize=1 << 16)
     def check_cidr(cidr):
-        try:
+        """ "1.2.3.4" fail, "1.2.3.4/24" pass """
+        address, slash, _ = cidr.partition("/")
+        if not slash or not is_ip(address):  # without the mask, it would be a mere IP address
+            return False
+        try:  # only the mask is left to be checked
             ipaddress.ip_interface(cidr)
-            try:
-                ipaddress.ip_address(cidr)
-            except ValueError:  # "1.2.3.4" fail, "1.2.3.4/24" pass
-                return True
+            return True
         except ValueError:
             return False
 
     @staticmethod
+    def clear_cache():
+        """ Forget the memoized checks, values of the previous file are not likely to come again. """
+        for method in (is_ip, Checker.check_cidr, Checker.is_base64, Checker.check_wrong_url):
+            method.cache_clear()
+
+    @staticmethod
+    @lru_cache(maxsize=1 << 15)
     def is_base64(x):
+        """ decodes_base64 memoized, a column repeats its values """
+        return Checker.decodes_base64(x)
+
+    @staticmethod
+    def decodes_base64(x):
         """ 1. We consider base64-endocded only such strings that could be decoded to UTF-8
                 because otherwise any ASCII input would be considered as base64, even when well readable at first sight
             2. There must be at least single letter, port number would be mistaken for base64 fields """
+        if not reLetter.search(x):  # cheaper than decoding, checked first
+            return None
         try:
-            return b64decode(x).decode("UTF-8") and re.search(r"[A-Za-z]+", x)
+            return bool(b64decode(x).decode("UTF-8"))
         except (UnicodeDecodeError, ValueError):
             return None
 
@@ -251,14 +341,15 @@ class Checker:
         return unquote(x) != x
 
     @staticmethod
+    @lru_cache(maxsize=1 << 15)
     def check_wrong_url(wrong):
-        if (reUrl.match(wrong) and "[.]" not in wrong) or reFqdn.match(wrong) or is_ip(wrong):
+        if (reUrl.match(wrong) and "[.]" not in wrong) or is_fqdn(wrong) or is_ip(wrong):
             # input "example[.]com" would be admitted as a valid URL)
             return False
         s = wrong_url_2_url(wrong, make=False)
-        s2 = wrong_url_2_url(wrong, make=True)
+        s2 = s if s.startswith("http") else "http://" + s  # = wrong_url_2_url(wrong, make=True)
         # Xm = reUrl.match(s2)
-        if reFqdn.match(s) or reFqdn.match(urlparse(s2).netloc):  # X(m and m.span(0)[1] == len(s2) and "." in s2):
+        if is_fqdn(s) or is_fqdn(urlparse(s2).netloc):  # X(m and m.span(0)[1] == len(s2) and "." in s2):
             # Xwe impose full match
             # Xstring created from "x"*100 would be submitted for a valid URL
             return True
@@ -380,7 +471,9 @@ class Checker:
 
 
 def wrong_url_2_url(s, make=True):
-    s = s.replace("hxxp", "http", 1).replace("[.]", ".").replace("(.)", ".").replace("[:]", ":")
+    s = s.replace("hxxp", "http", 1)
+    if "[" in s or "(" in s:  # a defanged dot or colon
+        s = s.replace("[.]", ".").replace("(.)", ".").replace("[:]", ":")
     if make and not s.startswith("http"):
         s = "http://" + s
     return s
@@ -406,7 +499,7 @@ def port_ip_port(s):
 
 def url_port(s):
     s = s.split(":")[1]
-    return re.match("^(\d*)", s).group(1)
+    return reDigits.match(s).group(0)
 
 
 class Web:
@@ -417,6 +510,11 @@ class Web:
     store_html = True
     store_text = True
     headers = {}
+    session = requests.Session()  # keeps connections alive, subsequent pages of the same host skip the TCP/TLS handshake
+    workers = 16  # parallel connections of fetch_many
+    # keep the pools of more hosts than the default 10, a column of URLs rarely repeats the same host in a row
+    session.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=workers))
+    session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=workers))
 
     @classmethod
     def init(cls, fields: List = None):
@@ -428,6 +526,23 @@ class Web:
         if Config.get("user_agent", "FIELDS"):
             cls.headers = {"User-Agent": Config.get("user_agent", "FIELDS")}
 
+    @classmethod
+    def fetch_many(cls, urls):
+        """ Scrape the not yet cached URLs in parallel so that the subsequent Web(url) calls are answered from the cache. """
+        urls = {url for url in urls if url not in cls.cache}
+        if urls:
+            logger.info(f"Scrapping {len(urls)} URLs...")
+            run_many(cls, urls, cls.workers)  # connection errors are cached as well, other exceptions are left to the line
+
+    @staticmethod
+    def _guess_encoding(response):
+        """ Most of the pages are UTF-8 which is quickly verified by decoding, chardet is run only if that fails. """
+        try:
+            response.content.decode("utf-8")
+        except UnicodeDecodeError:
+            return response.apparent_encoding
+        return "utf-8"
+
     def __init__(self, url):
         if url in self.cache:
             self.get = self.cache[url]
@@ -438,7 +553,7 @@ class Web:
         while True:
             try:
                 logger.debug(f"Scrapping connection to {current_url}")
-                response = requests.get(current_url, timeout=3, headers=self.headers, allow_redirects=False)
+                response = self.session.get(current_url, timeout=3, headers=self.headers, allow_redirects=False)
             except IOError as e:
                 if isinstance(e, requests.exceptions.HTTPError):
                     s = 0
@@ -457,22 +572,27 @@ class Web:
                 redirects.append(current_url)
                 continue
             else:
-                response.encoding = response.apparent_encoding  # https://stackoverflow.com/a/52615216/2036148
+                # requests assumes ISO-8859-1 for a text without a charset in the headers, see <meta charset> then.
+                # Guessing by the whole content is slow, that is the last resort. https://stackoverflow.com/a/52615216/2036148
+                if not response.encoding or response.encoding.lower() == "iso-8859-1":
+                    m = reCharset.search(response.content[:4096])
+                    response.encoding = m.group(1).decode("ascii") if m else self._guess_encoding(response)
                 if self.store_text:
                     soup = BeautifulSoup(response.text, features="html.parser")
                     # check redirect
                     res = soup.select("meta[http-equiv=refresh i]")
                     if res:
                         wait, txt = res[0].attrs["content"].split(";")
-                        m = re.search(r"http[^\"'\s]*", txt)
+                        m = reRefreshUrl.search(txt)
                         if m:
                             current_url = m.group(0)
                             redirects.append(current_url)
                             continue
                     # prepare content to be shortened
-                    [s.extract() for s in soup(["style", "script", "head"])]  # remove tags with low probability of content
-                    text = re.sub(r'\n\s*\n', '\n', soup.text)  # reduce multiple new lines to singles
-                    text = re.sub(r'[^\S\r\n][^\S\r\n]*[^\S\r\n]', ' ', text)  # reduce multiple spaces (not new lines) to singles
+                    for tag in soup(["style", "script", "head"]):  # remove tags with low probability of content
+                        tag.decompose()
+                    text = reBlankLines.sub('\n', soup.text)  # reduce multiple new lines to singles
+                    text = reSpaces.sub(' ', text)  # reduce multiple spaces (not new lines) to singles
                 else:
                     text = None
                 # for res in response.history[1:]:
@@ -513,6 +633,7 @@ def dig(rr):
         logger.debug(f"Dug {spl}")
         return spl
 
+    dig_query.slow = True  # a DNS request without a batch version, see processor.is_offline
     return dig_query
 
 
@@ -520,25 +641,40 @@ def dig(rr):
 # 1. since for port '80' wizzard loads the port '8' and then '80'
 # 2. since we cannot specify `--field ports[80,443]` because comma ',' is taken for a delmiiter between FIELD and COLUMN
 #   and pair quoting char '[]' is not allowed in csv.reader that parses CLI
+NMAP_WORKERS = 8  # parallel nmap processes of nmap_many
+nmap_cache = {}  # (val, port) → raw nmap output
+
+
+def nmap_many(vals):
+    """ Scan the not yet scanned hosts in parallel so that the subsequent nmap(val) calls are answered from the cache. """
+    vals = {val for val in vals if (val, "") not in nmap_cache}
+    if vals and shutil.which("nmap"):  # if missing, the first line asks the user about the dependency
+        logger.info(f"NMAPing {len(vals)} hosts...")
+        run_many(nmap, vals, NMAP_WORKERS)
+
+
 def nmap(val, port=""):
     """
     :type port: int Port to scan, you may delimit by a comma. Ex: `80, 443`
     """
-    logger.info(f"NMAPing {val}...")
-    try:
-        cmd = ["nmap", val]
-        if port:
-            cmd.extend(["-p", port])
-        text = subprocess.run(cmd, stdout=subprocess.PIPE).stdout.decode("utf-8")
-    except FileNotFoundError:
-        Config.missing_dependency("nmap")
+    if (val, port) in nmap_cache:
+        text = nmap_cache[val, port]
+    else:
+        logger.info(f"NMAPing {val}...")
+        try:
+            cmd = ["nmap", val]
+            if port:
+                cmd.extend(["-p", port])
+            text = nmap_cache[val, port] = subprocess.run(cmd, stdout=subprocess.PIPE).stdout.decode("utf-8")
+        except FileNotFoundError:
+            Config.missing_dependency("nmap")
     text = text[text.find("PORT"):]
     text = text[text.find("\n") + 1:]
     text = text[:text.find("\n\n")]
     if Config.get("multiple_nmap_ports", "FIELDS"):
         l = []
         for row in text.split("\n"):
-            l.append(int(re.match("(\d+)", row).group(1)))
+            l.append(int(reNumber.match(row).group(0)))
         return l
 
     return text
@@ -563,6 +699,7 @@ class TypeGroup(IntEnum):
         for t in Types.get_guessable_types():
             if t.group is self:
                 t.is_disabled = True
+        Types.clear_cache()
 
 
 class Type:
@@ -571,12 +708,13 @@ class Type:
     """
 
     def __init__(self, name, group=TypeGroup.general, description="", usual_names=[], identify_method=None, is_private=False,
-                 from_message=None, usual_must_match=False):
+                 from_message=None, usual_must_match=False, must_contain=None):
         """
         :param name: Key name
         :param description: Help text
         :param usual_names: Names this column usually has (ex: source_ip for an IP column). List of str, lowercase, no spaces.
         :param identify_method: Lambda used to identify a value may be of this field type
+        :param must_contain: Substring every value of this type contains. Values without it are not passed to identify_method.
         :param is_private: User cannot add the field type (ex: whois, user can extend only netname which is accessed through it).
         """
         self.name = name
@@ -584,6 +722,7 @@ class Type:
         self.usual_names = usual_names
         self.usual_must_match = usual_must_match
         self.identify_method = identify_method
+        self.must_contain = must_contain
         self.description = description
         self.is_private = is_private
         self.is_disabled = False  # disabled field cannot be added (and computed)
@@ -606,6 +745,8 @@ class Type:
         self.__dict__.update(getattr(Types, state).__dict__)
 
     def __eq__(self, other):
+        if self is other:  # the common case, types are singletons (but the unpickled ones are copies)
+            return True
         if other is None:
             return False
         if type(other) is str:
@@ -659,18 +800,24 @@ class Type:
         if self != Types.plaintext:
             self.is_plaintext_derivable = bool(graph.dijkstra(self, start=Types.plaintext))
 
-    def check_conformity(self, samples, has_header, field):
+    @staticmethod
+    def normalize_header(field):
+        """ Column name in the form of usual_names: lowercase, no spaces, no quotes. """
+        return str(field).replace(" ", "").replace("'", "").replace('"', "").lower()
+
+    def check_conformity(self, samples, header):
         """
+        :param samples: Counter of the sample values, each distinct value is identified once and weighted by its count
+        :param header: Column name normalized by Type.normalize_header or None if there is no header.
         :rtype: int|False Score if the given info conforms to this type.
         """
         score = 0
         # print("Guess:", key, names, checkFn)
         # guess field type by name
 
-        if has_header:
-            s = str(field).replace(" ", "").replace("'", "").replace('"', "").lower()
+        if header is not None:
             for n in self.usual_names:
-                if s in n or n in s:
+                if header in n or n in header:
                     # print("HEADER match", field, self, self.usual_names)
                     score += 2 if self.usual_must_match else 1
                     break
@@ -678,13 +825,21 @@ class Type:
             return False
         # else:
         # guess field type by few values
+        identify = self.identify_method
+        must_contain = self.must_contain or ""  # empty string is contained everywhere
+        total = sum(samples.values())
         hits = 0
-        for val in samples:
-            if self.identify_method(val):
-                # print("Match")
-                hits += 1
+        remaining = total
+        for val, count in samples.items():
+            remaining -= count
+            if must_contain in val and identify(val):
+                hits += count
+                if hits > 0.8 * total:  # the best score is reached
+                    break
+            if hits and hits + remaining <= 0.6 * total:  # no better score is reachable
+                break
         try:
-            percent = hits / len(samples)
+            percent = hits / total
         except ZeroDivisionError:
             percent = 0
         if percent == 0:
@@ -703,23 +858,31 @@ class Types:
     Ex: (whois, asn): lambda x: (x, x.get[3])
 
     """
+    _guessable_types = None  # cached get_guessable_types()
+    _computable_types = {}  # cached get_computable_types() by ignore_custom
+
+    @staticmethod
+    def clear_cache():
+        """ Types, methods or their disabled state changed, computable and guessable types have to be listed again. """
+        Types._guessable_types = None
+        Types._computable_types.clear()
 
     @staticmethod
     def refresh():
         """ refreshes methods and import custom methods from files """
+        Types.clear_cache()
         methods.clear()
         methods.update(Types._get_methods())
-        [graph.add_edge(to, from_) for to, from_ in methods if methods[to, from_] is not True]
-        [t.init() for t in types]
+        for (to, from_), m in methods.items():
+            if m is not True:
+                graph.add_edge(to, from_)
+        for t in types:
+            t.init()
 
-        try:
-            externals = Config.config["EXTERNAL"]
-        except KeyError:
-            externals = []
-        for field_name in externals:
+        for field_name, val in Config.get_section("EXTERNAL").items():
             if field_name == "external_fields":  # this is a genuine field, user did not make it
                 continue
-            path, method_name = Config.config["EXTERNAL"][field_name].rsplit(":")
+            path, method_name = val.rsplit(":")
             module = get_module_from_path(path)
             Types.import_method(module, method_name, path, name=field_name)
 
@@ -745,6 +908,7 @@ class Types:
         if isinstance(lambda_, ABCMeta):  # this is just an import statement of ex: PickBase
             return
         doc = lambda_.__doc__ if not isinstance(lambda_, PickBase) else lambda_.get_type_description()
+        Types.clear_cache()
         if Config.get("disable_external", get=bool) is True:
             # user do not want to allow externals to be added but we have added them before argparse was parsed
             # so that we could inform the user in the help text of the computable fields
@@ -825,21 +989,22 @@ class Types:
                      ["sourceipaddress", "source", "src"], is_ip, usual_must_match=True)
     destination_ip = Type("destination_ip", TypeGroup.general, "valid destination IP address",
                           ["destinationipaddress", "destination", "dest", "dst"], is_ip, usual_must_match=True)
-    port = Type("port", TypeGroup.general, "port", ["port", "prt"], lambda x: re.match("\d{1,5}", x), usual_must_match=True)
-    cidr = Type("cidr", TypeGroup.general, "CIDR 127.0.0.1/32", ["cidr"], Checker.check_cidr)
-    port_ip = Type("port_ip", TypeGroup.general, "IP in the form 1.2.3.4.port", [], reIpWithPort.match)
+    port = Type("port", TypeGroup.general, "port", ["port", "prt"], rePort.match, usual_must_match=True)
+    cidr = Type("cidr", TypeGroup.general, "CIDR 127.0.0.1/32", ["cidr"], Checker.check_cidr, must_contain="/")
+    port_ip = Type("port_ip", TypeGroup.general, "IP in the form 1.2.3.4.port", [], reIpWithPort.match, must_contain=".")
     any_ip = Type("any_ip", TypeGroup.general, "IP in the form 'any text 1.2.3.4 any text'", [],
-                  lambda x: reAnyIp.search(x) and not is_ip(x))
-    hostname = Type("hostname", TypeGroup.general, "2nd or 3rd domain name", ["fqdn", "hostname", "domain"], reFqdn.match)
-    email = Type("email", TypeGroup.general, "E-mail address", ["mail"], validate_email)
+                  lambda x: reAnyIp.search(x) and not is_ip(x), must_contain=".")
+    hostname = Type("hostname", TypeGroup.general, "2nd or 3rd domain name", ["fqdn", "hostname", "domain"], is_fqdn,
+                    must_contain=".")
+    email = Type("email", TypeGroup.general, "E-mail address", ["mail"], validate_email, must_contain="@")
     url = Type("url", TypeGroup.general, "URL starting with http/https", ["url", "uri", "location"],
-               lambda s: reUrl.match(s) and "[.]" not in s)  # input "example[.]com" would be admitted as a valid URL)
+               lambda s: reUrl.match(s) and "[.]" not in s, must_contain="://")  # input "example[.]com" would be admitted as a valid URL)
     asn = Type("asn", TypeGroup.whois, "Autonomous system number", ["as", "asn", "asnumber"],
-               lambda x: re.search('AS\d+', x) is not None)
+               reAsn.search, must_contain="AS")
     base64 = Type("base64", TypeGroup.general, "Text encoded with Base64", ["base64"], Checker.is_base64)
-    quoted_printable = Type("quoted_printable", TypeGroup.general, "Text encoded as quotedprintable", [], Checker.is_quopri)
-    urlencode = Type("urlencode", TypeGroup.general, "Text encoded with urlencode", ["urlencode"], Checker.is_urlencode)
-    wrong_url = Type("wrong_url", TypeGroup.general, "Deactivated URL", [], Checker.check_wrong_url)
+    quoted_printable = Type("quoted_printable", TypeGroup.general, "Text encoded as quotedprintable", [], Checker.is_quopri, must_contain="=")
+    urlencode = Type("urlencode", TypeGroup.general, "Text encoded with urlencode", ["urlencode"], Checker.is_urlencode, must_contain="%")
+    wrong_url = Type("wrong_url", TypeGroup.general, "Deactivated URL", [], Checker.check_wrong_url, must_contain=".")
     plaintext = Type("plaintext", TypeGroup.general, "Plain text", ["plaintext", "text"], lambda x: False)
 
     @staticmethod
@@ -848,6 +1013,8 @@ class Types:
         :type ignore_custom: bool Ignore types that may not be reachable because user input would be needed.
             These are TypeGroup.custom and instances of PickBase.
         """
+        if ignore_custom in Types._computable_types:
+            return Types._computable_types[ignore_custom]
         s = set()
         for (_, target_type), m in methods.items():
             if ignore_custom and (target_type.group == TypeGroup.custom or (isinstance(m, PickBase) and not m.default)):
@@ -855,12 +1022,15 @@ class Types:
             if target_type.is_private or target_type.is_disabled:
                 continue
             s.add(target_type)
-        return sorted(s)
+        result = Types._computable_types[ignore_custom] = sorted(s)
+        return result
 
     @staticmethod
     def get_guessable_types() -> List[Type]:
         """ these field types can be guessed from a string """
-        return sorted([t for t in types if not t.is_disabled and (t.identify_method or t.usual_names)])
+        if Types._guessable_types is None:
+            Types._guessable_types = sorted([t for t in types if not t.is_disabled and (t.identify_method or t.usual_names)])
+        return Types._guessable_types
 
     @staticmethod
     def get_uml(flags):
@@ -985,7 +1155,7 @@ class Types:
             (t.whois, t.abusemail): lambda x: x.get[6],
             (t.whois, t.country): lambda x: x.get[5],
             (t.whois, t.netname): lambda x: x.get[4],
-            (t.whois, t.csirt_contact): lambda x: Contacts.csirtmails[x.get[5]] if x.get[5] in Contacts.csirtmails else "-",
+            (t.whois, t.csirt_contact): lambda x: Contacts.csirtmails.get(x.get[5], "-"),
             (t.whois, t.incident_contact): lambda x: x.get[2],
             (t.plaintext, t.bytes): lambda x: x.encode("UTF-8"),
             (t.bytes, t.plaintext): Checker.bytes_plaintext,
@@ -993,8 +1163,8 @@ class Types:
             (t.base64, t.bytes): b64decode,
             (t.bytes, t.quoted_printable): lambda x: encodestring(x).decode("UTF-8"),
             (t.quoted_printable, t.bytes): decodestring,
-            (t.urlencode, t.plaintext): lambda x: unquote(x),
-            (t.plaintext, t.urlencode): lambda x: quote(x),
+            (t.urlencode, t.plaintext): unquote,
+            (t.plaintext, t.urlencode): quote,
             (t.plaintext, t.external): None,
             (t.plaintext, t.code): None,
             (t.plaintext, t.reg): None,
@@ -1040,12 +1210,23 @@ class Types:
         }
 
 
+module_cache = {}  # path → ((mtime, size), module) so that an unchanged file is not executed again
+
+
 def get_module_from_path(path):
-    if not Path(path).is_file():
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if not stat.S_ISREG(st.st_mode):
         return False
+    key = st.st_mtime_ns, st.st_size
+    if path in module_cache and module_cache[path][0] == key:
+        return module_cache[path][1]
     spec = importlib.util.spec_from_file_location("", path)
     module = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(module)
+    module_cache[path] = key, module
     return module
 
 
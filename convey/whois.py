@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 from subprocess import PIPE, Popen
 from time import time, sleep
 
-from netaddr import IPRange, IPNetwork
+from netaddr import AddrFormatError, IPAddress, IPRange, IPNetwork
 
 from .config import Config, subprocess_env
 from .contacts import Contacts
@@ -57,6 +57,7 @@ class Whois:
         cls.stats = stats
         cls.ranges = ranges
         cls.ip_seen = ip_seen  # ip_seen[ip] = prefix
+        cls.no_prefix = {}  # no_prefix[ip] = get; WHOIS found no prefix to share, do not ask again for the IP during this run
         cls.servers = OrderedDict()
         cls.unknown_mode = unknown_mode  # if True, we use b flag in abusemails
         cls.slow_mode = slow_mode  # due to LACNIC quota
@@ -88,6 +89,10 @@ class Whois:
                 else:
                     self.count_stats()
                     return
+            elif ip in self.no_prefix:
+                self.get = self.no_prefix[ip]
+                self.count_stats()
+                return
 
         if self.see:
             print(f"Whois {ip}... ", end="", flush=True)
@@ -101,6 +106,7 @@ class Whois:
         prefix = get[0]
         if not prefix:
             logger.info("No prefix found for IP {}".format(ip))
+            self.no_prefix[ip] = get
         self.ip_seen[ip] = prefix
         self.get = self.ranges[prefix] = get
         self.count_stats()
@@ -112,10 +118,14 @@ class Whois:
             return prefix
         elif self.ip in self.queued_ips:
             raise self.quota.QuotaExceeded
+        try:  # parse once, not by every prefix
+            address = IPAddress(self.ip)
+        except (AddrFormatError, ValueError):  # let the prefixes cope with it as they used to, ex: a network "1.2.3.0/24"
+            address = self.ip
         for prefix in self.ranges:
             # search for prefix the slow way. I dont know how to make this shorter because IP can be in shortened form so that
             # in every case I had to put it in full form and then slowly compare strings with prefixes.
-            if prefix and self.ip in prefix:
+            if prefix and address in prefix:
                 self.get = self.ranges[prefix]
                 self.ip_seen[self.ip] = prefix
                 return prefix
@@ -3,13 +3,15 @@
 """
 import re
 import sys
+import threading
 from bdb import BdbQuit
 from os import linesep
 from pathlib import Path
 
 import jsonpickle
 
-from .config import Config, config_dir
+from . import config
+from .config import Config
 from .dialogue import is_yes
 from .identifier import Identifier
 from .parser import Parser
@@ -45,9 +47,11 @@ def read_stdin():
 class Wrapper:
     def __init__(self, file_or_input, force_file=False, force_input=False, fresh=False, delete_cache=False):
         if delete_cache:
-            Path(config_dir, WHOIS_CACHE).unlink()
+            Path(config.config_dir, WHOIS_CACHE).unlink()
 
         self.parser: Parser
+        self.writer: threading.Thread = None  # writes the files of the last save() in the background
+        self.write_error: Exception = None  # caught in the writer, re-raised by flush()
         self.file = file = None
         self.stdin = stdin = None
         self.fresh = fresh
@@ -155,7 +159,7 @@ class Wrapper:
 
     @staticmethod
     def load_whois_cache():
-        p = Path(config_dir, WHOIS_CACHE)  # restore whois cache
+        p = Path(config.config_dir, WHOIS_CACHE)  # restore whois cache
         if p.exists():
             return jsonpickle.decode(p.read_text(), keys=True)
         return {}, {}
@@ -214,20 +218,39 @@ class Wrapper:
 
         # save cache file
         if self.cache_file:  # cache_file does not exist typically if reading from STDIN
+            self.flush()  # the previous write must not interleave with this one
+            whois = None
             if self.parser.ranges:
                 # we extract whois info from self.parser and save it apart for every convey instance
                 if self.fresh:  # if we wanted a fresh result, global whois cache was not used and we have to merge it
                     ip_seen, ranges = self.load_whois_cache()
-                    ip_seen = {**ip_seen, **self.parser.ip_seen}
-                    ranges = {**ranges, **self.parser.ranges}
-                else:
-                    ip_seen, ranges = self.parser.ip_seen, self.parser.ranges
+                    whois = {**ip_seen, **self.parser.ip_seen}, {**ranges, **self.parser.ranges}
+                else:  # copy so that the user may continue processing while we write
+                    whois = dict(self.parser.ip_seen), dict(self.parser.ranges)
+            # disk IO happens while the user reads the menu; the thread is not a daemon so the interpreter waits for it
+            self.writer = threading.Thread(target=self._write, args=(self.cache_file, string, whois))
+            self.writer.start()
+
+    def _write(self, cache_file, string, whois):
+        try:
+            if whois:
                 # note that ip_seen MUST be placed before ranges due to https://github.com/jsonpickle/jsonpickle/issues/280
                 # That way, a netaddr object (IPNetwork, IPRange) are defined as value in ip_seen and not as key in range.
-                encoded = jsonpickle.encode([ip_seen, ranges], keys=True)
-                Path(config_dir, WHOIS_CACHE).write_text(encoded)
-            with open(self.cache_file, "w") as output:  # save cache
+                encoded = jsonpickle.encode(list(whois), keys=True)
+                Path(config.config_dir, WHOIS_CACHE).write_text(encoded)
+            with open(cache_file, "w") as output:  # save cache
                 output.write(string)
+        except Exception as e:  # an exception would die with the thread
+            self.write_error = e
+
+    def flush(self):
+        """ Wait till the files of the last save() are written. Raise the exception the writing failed with. """
+        if self.writer:
+            self.writer.join()
+            self.writer = None
+        if self.write_error:
+            e, self.write_error = self.write_error, None
+            raise e
 
     def clear(self):
         # Check if the contents is a CSV and not just a log
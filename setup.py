@@ -29,6 +29,7 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     install_requires=[requirements.split("\n")],
+    extras_require={"re2": ["google-re2"]},  # faster type detection, see types.compile_dfa
     entry_points={
         'console_scripts': [
             'convey = convey.__main__:main',
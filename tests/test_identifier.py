@@ -0,0 +1,37 @@
+import unittest
+from csv import Sniffer
+
+from convey.identifier import Identifier
+
+SAMPLES = {
+    ",": ["ip,hostname,port\n", "1.2.3.4,example.com,80\n", "5.6.7.8,example.org,443\n", "9.9.9.9,test.cz,22\n"],
+    "\t": ["ip\thostname\tport\n", "1.2.3.4\texample.com\t80\n", "5.6.7.8\texample.org\t443\n"],
+    ";": ["1.2.3.4;example.com;80\n", "5.6.7.8;example.org;443\n", "9.9.9.9;test.cz;22\n"],
+    ", ": ["ip, hostname, port\n", "1.2.3.4, example.com, 80\n", "5.6.7.8, example.org, 443\n"],
+}
+QUOTED = ['ip,"hostname, full",port\n', '1.2.3.4,"example.com, www",80\n', '5.6.7.8,"example.org, mail",443\n']
+
+
+class TestIdentifier(unittest.TestCase):
+
+    def assert_as_sniffer(self, sample):
+        text = "".join(sample)
+        expected, expected_header = Sniffer().sniff(text), Sniffer().has_header(text)
+        dialect, has_header, _ = Identifier.guess_dialect(sample)
+        for attr in ("delimiter", "quotechar", "skipinitialspace"):
+            self.assertEqual(getattr(expected, attr), getattr(dialect, attr), attr)
+        self.assertEqual(expected_header, has_header)
+
+    def test_consistent_delimiter_matches_sniffer(self):
+        for delimiter, sample in SAMPLES.items():
+            with self.subTest(delimiter=delimiter):
+                self.assertIsNotNone(Identifier._consistent_delimiter(sample))  # the fast path is taken
+                self.assert_as_sniffer(sample)
+
+    def test_quoted_sample_is_sniffed(self):
+        self.assertIsNone(Identifier._consistent_delimiter(QUOTED))
+        self.assert_as_sniffer(QUOTED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import csv
+import io
+import logging
+import unittest
+from collections import defaultdict
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from convey.config import Config
+from convey.informer import Informer
+from convey.parser import Parser, Field
+
+
+def get_parser():
+    """ Parser with a formatted sample, bypassing the source file analysis. """
+    parser = Parser.__new__(Parser)
+    parser.settings = defaultdict(list)
+    parser.dialect = csv.unix_dialect
+    parser.stdin, parser.source_file, parser.has_header = False, "sample.csv", True
+    parser.line_count, parser.lines_total = 0, 1
+    parser.time_start = parser.time_end = None
+    parser.queued_lines_count = 0
+    parser.whois_stats = None
+    parser.is_analyzed = False
+    parser.is_formatted = True
+    parser.sample = ["a,b\n", "1,2\n"]
+    parser.sample_parsed = [["1", "2"]]
+    parser.fields = [Field("a"), Field("b")]
+    parser.informer = Informer(parser)
+    return parser
+
+
+class TestInformer(unittest.TestCase):
+
+    @patch.object(Config, "get", return_value=None)
+    @patch.object(Config, "verbosity", logging.INFO)
+    def test_preview_uses_changed_dialect(self, _):
+        parser = get_parser()
+        parser.settings["dialect"] = {"delimiter": ";", "quotechar": '"', "quoting": csv.QUOTE_MINIMAL}
+        out = io.StringIO()
+        with redirect_stdout(out):
+            parser.informer.sout_info(clear=False)
+        preview = out.getvalue().split("Compact preview:")[1]
+        self.assertIn(";", preview)
+        self.assertNotIn(",", preview)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+from convey.wrapper import Wrapper
+
+
+class TestWrapper(unittest.TestCase):
+
+    def test_failed_write_is_reported(self):
+        wrapper = Wrapper.__new__(Wrapper)  # bypass the source file analysis
+        wrapper.parser = SimpleNamespace(ranges={})
+        wrapper.fresh = False
+        wrapper.writer = wrapper.write_error = None
+        with TemporaryDirectory() as d:
+            wrapper.cache_file = Path(d, "missing-dir", "source.cache")
+            wrapper.save()
+            self.assertRaises(FileNotFoundError, wrapper.flush)
+        wrapper.flush()  # reported just once
+
+
+if __name__ == "__main__":
+    unittest.main()